@@ -0,0 +1,168 @@
+# analytics.py
+import json
+import math
+import os
+
+CUBE_FILE = 'accuracy_cube.json'
+HISTORY_FILE = 'prediction_history.csv'
+BUCKETS = 10          # Calibration buckets over the home win probability (0-10%, 10-20%, ...)
+EPSILON = 1e-15       # Clamp for log-loss so a 0%/100% miss doesn't produce infinity
+
+def _empty_cell():
+    return {'games': 0, 'correct': 0, 'brier': 0.0, 'log_loss': 0.0, 'prob': 0.0, 'home_wins': 0}
+
+def bucket_for(prob):
+    return min(int(prob * BUCKETS), BUCKETS - 1)
+
+def file_fingerprint(path):
+    """[size, mtime in ns] of a file, or None if it does not exist."""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return [info.st_size, info.st_mtime_ns]
+
+class AccuracyCube:
+    """
+    Running sums of accuracy, Brier score and log-loss for finished games, keyed by
+    slice (all games, season, week, team, team-season, probability bucket and
+    bucket-season). Adding a game touches a fixed number of cells and reading any
+    slice is a single dictionary lookup.
+
+    'history' is the fingerprint of the history file the cells match (None if there
+    was no file). 'stale' is set once that file has rows the cube has not seen.
+    """
+    def __init__(self, cells=None, history=None):
+        self.cells = cells or {}
+        self.history = history
+        self.stale = False
+
+    @staticmethod
+    def keys_for(year, seasontype, week, home_team, away_team, bucket):
+        return [
+            'all',
+            f'season:{year}',
+            f'week:{year}:{seasontype}:{week}',
+            f'team:{home_team}', f'team:{home_team}:{year}',
+            f'team:{away_team}', f'team:{away_team}:{year}',
+            f'bucket:{bucket}', f'bucket:{bucket}:{year}'
+        ]
+
+    def add_game(self, year, seasontype, week, home_team, away_team, home_prob, predicted_winner, actual_winner):
+        """Adds one finished game. Ties and games without a probability are ignored."""
+        if not actual_winner or home_prob is None:
+            return
+        outcome = 1 if actual_winner == home_team else 0
+        clamped = min(max(home_prob, EPSILON), 1 - EPSILON)
+        brier = (home_prob - outcome) ** 2
+        log_loss = -math.log(clamped if outcome else 1 - clamped)
+        correct = 1 if predicted_winner == actual_winner else 0
+
+        for key in self.keys_for(year, seasontype, week, home_team, away_team, bucket_for(home_prob)):
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = _empty_cell()
+            cell['games'] += 1
+            cell['correct'] += correct
+            cell['brier'] += brier
+            cell['log_loss'] += log_loss
+            cell['prob'] += home_prob
+            cell['home_wins'] += outcome
+
+    def add_record(self, record):
+        """Adds a prediction history record."""
+        self.add_game(
+            record.year, record.seasontype, record.week, record.home_team, record.away_team,
+            record.home_win_prob, record.predicted_winner, record.actual_winner
+        )
+
+    @property
+    def total_games(self):
+        return self.cells.get('all', {}).get('games', 0)
+
+    def summary(self, key):
+        """Returns the aggregates for one slice of the cube."""
+        cell = self.cells.get(key) or _empty_cell()
+        games = cell['games']
+        return {
+            "correct": cell['correct'],
+            "total": games,
+            "percentage": (cell['correct'] / games * 100) if games > 0 else 0,
+            "brier_score": cell['brier'] / games if games > 0 else None,
+            "log_loss": cell['log_loss'] / games if games > 0 else None
+        }
+
+    def week_accuracy(self, year, seasontype, week):
+        return self.summary(f'week:{year}:{seasontype}:{week}')
+
+    def calibration(self, year=None):
+        """Mean predicted home win probability vs. observed home win rate for each bucket."""
+        suffix = f':{year}' if year is not None else ''
+        points = []
+        for bucket in range(BUCKETS):
+            cell = self.cells.get(f'bucket:{bucket}{suffix}')
+            if not cell or not cell['games']:
+                continue
+            points.append({
+                "bucket": [bucket / BUCKETS, (bucket + 1) / BUCKETS],
+                "games": cell['games'],
+                "predicted": cell['prob'] / cell['games'],
+                "observed": cell['home_wins'] / cell['games']
+            })
+        return points
+
+    def track_append(self, before, after):
+        """
+        Follows this process's own append to the history file, given the file's
+        fingerprint just before and after it. If the file was not at the cube's
+        fingerprint beforehand, another writer added rows the cube lacks, so it is
+        marked stale rather than stamped with a fingerprint it was never built against.
+        Returns whether the cube still matches the file.
+        """
+        if self.stale or before != self.history:
+            self.stale = True
+            return False
+        self.history = after
+        return True
+
+    def save(self, path=CUBE_FILE):
+        """Writes the cube together with the fingerprint of the history file it matches."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'history': self.history, 'cells': self.cells}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def build(cls, history, fingerprint=None):
+        cube = cls(history=fingerprint)
+        for record in history:
+            cube.add_record(record)
+        return cube
+
+def load_or_build_cube(history, path=CUBE_FILE, history_path=HISTORY_FILE, fingerprint=None):
+    """
+    Loads the stored cube, rebuilding it from history if it is missing or was saved
+    for a different version of the history file (size or modification time differ).
+    'fingerprint' should be taken before 'history' was read, so that rows appended
+    while it was being read make the cube stale instead of silently missing.
+    """
+    if fingerprint is None:
+        fingerprint = file_fingerprint(history_path)
+    try:
+        with open(path, 'r') as f:
+            stored = json.load(f)
+        if isinstance(stored, dict) and 'cells' in stored and stored.get('history') is not None \
+                and stored['history'] == fingerprint:
+            return AccuracyCube(stored['cells'], fingerprint)
+        print("Accuracy cube is stale (history file changed); rebuilding.")
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Building accuracy cube from history ({e.__class__.__name__}).")
+
+    cube = AccuracyCube.build(history, fingerprint)
+    if fingerprint is None:
+        return cube
+    try:
+        cube.save(path)
+    except OSError as e:
+        print(f"Could not save accuracy cube: {e}")
+    return cube
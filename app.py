@@ -1,23 +1,37 @@
 # app.py
-from flask import Flask, jsonify, render_template
+from flask import Flask, jsonify, render_template, abort, request, Response, stream_with_context
 import csv
 import json
 import os
 import datetime
-from collections import defaultdict
+import threading
 
 # Refactored imports
-from data_loader import load_teams_from_csv, save_teams_to_csv
+from data_loader import (
+    load_teams_from_csv, save_teams_to_csv, load_current_season_stats, prediction_settings,
+    CURRENT_SEASON_STATS_FILE
+)
 from predict import predict_winner
 from team import parse_game_json
 from firebase_config import initialize_firebase
 import espn_api
+import analytics
+import history_query
+import ratings
+from history_store import FIELDNAMES, HistoryRecord, HistoryStore, load_history
+import profiler
+import survivor
+import schedule_index
+import matchup_matrix
+import scenario
+from history_generator import current_season_year
 
 from firebase_admin import db, auth
 
 # Initialize services
 initialize_firebase()
 app = Flask(__name__, template_folder='templates', static_folder='static')
+profiler.init_app(app)
 
 # --- Firebase Configuration for Frontend ---
 # This remains for client-side JS
@@ -35,31 +49,40 @@ else:
         firebase_config = {}
 # --- Constants and Globals ---
 HISTORY_FILE = 'prediction_history.csv'
-CURRENT_SEASON_STATS_FILE = 'current_season_stats.csv'
-FIELDNAMES = [
-    'year', 'seasontype', 'week', 'game_id', 'home_team', 'away_team',
-    'predicted_winner', 'actual_winner', 'home_win_prob', 'away_win_prob', 'is_correct'
-]
-prediction_history = []
+# Optional recency-weighted inputs for live predictions (PREDICTION_FORM: 'ewma' or 'last_n'),
+# and PREDICTION_RATINGS=1 to predict from opponent-adjusted ratings once teams have enough games.
+PREDICTION_FORM, USE_RATINGS = prediction_settings()
+prediction_history = HistoryStore()
 latest_season_stats = {}
 current_season_stats = {}
 teams_map = {}
 team_logos = {}
 divisions_map = []
+accuracy_cube = analytics.AccuracyCube()
+season_ratings = ratings.RatingsEngine()
 PLACEHOLDER_LOGO = 'https://placehold.co/40x40/cccccc/ffffff?text=?'
+schedule = schedule_index.ScheduleIndex(team_logos, PLACEHOLDER_LOGO)
+matchup_cache = matchup_matrix.MatrixCache()
+# Held while finished games are recorded into the history, season stats and ratings,
+# which sync and async (worker thread) requests can do at the same time.
+stats_lock = threading.Lock()
+# Bumped under stats_lock whenever the stats or solved ratings change; keys the matchup matrices.
+stats_version = 0
 
 # --- Data Loading ---
 def load_all_data():
     """Loads all necessary data when the application starts."""
-    global prediction_history, latest_season_stats, teams_map, current_season_stats, divisions_map
+    global prediction_history, latest_season_stats, teams_map, current_season_stats, divisions_map, accuracy_cube, season_ratings, stats_version
 
+    history_fingerprint = analytics.file_fingerprint(HISTORY_FILE)
     try:
-        with open(HISTORY_FILE, mode='r') as infile:
-            prediction_history = list(csv.DictReader(infile))
+        prediction_history = load_history(HISTORY_FILE)
         print("Prediction history loaded successfully.")
     except FileNotFoundError:
         print(f"WARNING: '{HISTORY_FILE}' not found.")
 
+    accuracy_cube = analytics.load_or_build_cube(prediction_history, history_path=HISTORY_FILE, fingerprint=history_fingerprint)
+
     try:
         latest_season_stats = load_teams_from_csv('./final_team_stats.csv')
         print("Base stats for live predictions loaded.")
@@ -93,29 +116,72 @@ def load_all_data():
     else:
         print(f"Could not fetch team logos: {error}")
 
-    try:
-        current_season_stats = load_teams_from_csv(CURRENT_SEASON_STATS_FILE)
-        print(f"Loaded in-progress season stats from '{CURRENT_SEASON_STATS_FILE}'.")
-    except FileNotFoundError:
-        print(f"'{CURRENT_SEASON_STATS_FILE}' not found. Initializing empty stats.")
-        current_season_stats = load_teams_from_csv('team_abv.csv')
+    current_season_stats = load_current_season_stats()
+
+    season_ratings = ratings.load_ratings()
+    print(f"Opponent-adjusted ratings built from {len(season_ratings.games)} games.")
+    stats_version += 1
 
 # --- Prediction and History Logic ---
 def append_to_history(game_data):
     """Appends a single game record to the history CSV and in-memory list."""
-    if any(str(g.get('game_id')) == str(game_data.get('game_id')) for g in prediction_history):
+    if game_data.get('game_id') in prediction_history:
         return
 
     try:
-        file_exists = os.path.isfile(HISTORY_FILE)
+        before = analytics.file_fingerprint(HISTORY_FILE)
+        file_exists = before is not None
         with open(HISTORY_FILE, 'a', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
             if not file_exists:
                 writer.writeheader()
             writer.writerow(game_data)
-        prediction_history.append(game_data)
+        record = HistoryRecord.from_row(game_data)
+        prediction_history.append(record)
     except IOError as e:
         print(f"Error appending to history file: {e}")
+        return
+
+    if record.actual_winner:
+        accuracy_cube.add_record(record)
+    # Saved after every append, not just finished games, so that the cube's
+    # fingerprint of the history file stays current. If someone else appended
+    # since the cube was built, it goes stale and the next start rebuilds it.
+    if not accuracy_cube.track_append(before, analytics.file_fingerprint(HISTORY_FILE)):
+        return
+    try:
+        accuracy_cube.save()
+    except OSError as e:
+        print(f"Error saving accuracy cube: {e}")
+
+def build_historical_week(year, seasontype, week, games_for_week, live_data):
+    """Historical predictions for a week, with scores and status from a live schedule."""
+    live_events = {event['id']: event for event in live_data.get('events', [])} if live_data else {}
+
+    predictions_list = []
+    for game in games_for_week:
+        live_game = live_events.get(game.game_id, {})
+        home_comp, away_comp = espn_api.parse_competitors(live_game)
+
+        game_info = {
+            "id": game.game_id, "date": live_game.get('date', ''), "name": live_game.get('name', ''), 
+            "status": live_game.get('status', {}).get('type', {}).get('detail', 'Unavailable'),
+            "home_team": {"abbreviation": game.home_team, "logo": team_logos.get(game.home_team, PLACEHOLDER_LOGO), "score": home_comp.get('score', '0'), "win_probability": game.home_win_prob or 0},
+            "away_team": {"abbreviation": game.away_team, "logo": team_logos.get(game.away_team, PLACEHOLDER_LOGO), "score": away_comp.get('score', '0'), "win_probability": game.away_win_prob or 0},
+            "predicted_winner": game.predicted_winner, "actual_winner": game.actual_winner,
+            "is_correct": game.is_correct is True
+        }
+        predictions_list.append(game_info)
+
+    return {"games": predictions_list, "accuracy": accuracy_cube.week_accuracy(year, seasontype, week)}
+
+def pending_boxscore_ids(data):
+    """Finished games in a live schedule whose result is not in the history yet."""
+    return [
+        game.get('id') for game in data.get('events', [])
+        if game.get('status', {}).get('type', {}).get('name') == 'STATUS_FINAL'
+        and game.get('id') not in prediction_history
+    ]
 
 def predict_future_week(year, seasontype, week):
     """Generates predictions for a future week."""
@@ -126,6 +192,16 @@ def predict_future_week(year, seasontype, week):
     if error:
         return {"error": f"Could not fetch live schedule: {error}"}, 500
 
+    boxscores = {game_id: espn_api.get_boxscore(game_id)[0] for game_id in pending_boxscore_ids(data)}
+    return build_future_week(year, seasontype, week, data, boxscores)
+
+def build_future_week(year, seasontype, week, data, boxscores):
+    """
+    Predicts every game of a fetched schedule, recording newly finished games in the
+    history and season stats. boxscores maps pending_boxscore_ids to their boxscore
+    (or None); fetching is left to the caller so it can be done sync or async.
+    """
+    global stats_version
     predictions_list = []
     stats_were_updated = False
     
@@ -140,7 +216,8 @@ def predict_future_week(year, seasontype, week):
         prediction_week = week if int(seasontype) == 2 else 18 + week
         predicted_winner, home_prob, away_prob = predict_winner(
             home_team_abv, away_team_abv, latest_season_stats, 
-            current_season_stats, prediction_week, home_team_abv
+            current_season_stats, prediction_week, home_team_abv, PREDICTION_FORM,
+            season_ratings if USE_RATINGS else None
         )
 
         game_info = {
@@ -152,7 +229,7 @@ def predict_future_week(year, seasontype, week):
         }
         
         is_final = game.get('status', {}).get('type', {}).get('name') == 'STATUS_FINAL'
-        game_in_history = next((g for g in prediction_history if str(g.get('game_id')) == str(game_id)), None)
+        game_in_history = prediction_history.get(game_id)
 
         if is_final and not game_in_history:
             actual_winner = home_team_abv if home_team_data.get('winner') else (away_team_abv if away_team_data.get('winner') else None)
@@ -165,32 +242,55 @@ def predict_future_week(year, seasontype, week):
                 'home_team': home_team_abv, 'away_team': away_team_abv, 'predicted_winner': predicted_winner,
                 'actual_winner': actual_winner, 'home_win_prob': home_prob, 'away_win_prob': away_prob, 'is_correct': is_correct
             }
-            append_to_history(history_row)
-
-            box_data, _ = espn_api.get_boxscore(game_id)
-            if box_data:
-                parse_game_json(box_data, current_season_stats)
-                stats_were_updated = True
+            with stats_lock:
+                # Re-checked under the lock so a concurrent request can't count the game twice.
+                if game_id not in prediction_history:
+                    append_to_history(history_row)
+
+                    box_data = boxscores.get(game_id)
+                    if box_data:
+                        parsed_game = parse_game_json(box_data, current_season_stats)
+                        if parsed_game:
+                            season_ratings.add_game(parsed_game, game_id)
+                        stats_were_updated = True
         elif game_in_history:
-            game_info.update({"actual_winner": game_in_history.get('actual_winner'), "is_correct": game_in_history.get('is_correct') == 'True'})
+            game_info.update({"actual_winner": game_in_history.actual_winner, "is_correct": game_in_history.is_correct is True})
 
         predictions_list.append(game_info)
 
     if stats_were_updated:
         print(f"Saving updated season stats to '{CURRENT_SEASON_STATS_FILE}'...")
-        save_teams_to_csv(current_season_stats, CURRENT_SEASON_STATS_FILE)
+        with stats_lock:
+            save_teams_to_csv(current_season_stats, CURRENT_SEASON_STATS_FILE)
+            season_ratings.solve()
+            ratings.save_ratings(season_ratings)
+            stats_version += 1
+
+    result = {"games": predictions_list, "accuracy": accuracy_cube.week_accuracy(year, seasontype, week)}
+    if data.get('stale'):
+        # ESPN is unavailable; scores and statuses are from the last good fetch.
+        result["stale_since"] = data.get('fetched_at')
+    return result, 200
+
+def list_user_emails():
+    return {user.uid: user.email for user in auth.list_users().iterate_all()}
 
-    return {"games": predictions_list, "accuracy": {"correct": 0, "total": 0, "percentage": 0}}, 200
+def get_lms_players(year):
+    return db.reference(f'last_man_standing/{year}').get()
 
 def calculate_leaderboard():
     """Calculates total wins and current streak for all players."""
     try:
         year = datetime.date.today().year
+        return build_leaderboard(list_user_emails(), get_lms_players(year))
+    except Exception as e:
+        print(f"An error occurred while calculating the leaderboard: {e}")
+        return []
+
+def build_leaderboard(uid_to_email, all_players_data):
+    """Ranks players by total wins, then current streak, from their LMS picks."""
+    try:
         leaderboard = []
-        uid_to_email = {user.uid: user.email for user in auth.list_users().iterate_all()}
-        
-        lms_ref = db.reference(f'last_man_standing/{year}')
-        all_players_data = lms_ref.get()
         if not all_players_data: return []
 
         for uid, data in all_players_data.items():
@@ -247,102 +347,299 @@ def last_man_standing():
 
 @app.route('/standings/<int:year>/<int:seasontype>')
 def standings(year, seasontype):
-    standings_data = defaultdict(lambda: {'actual_wins': 0, 'actual_losses': 0, 'actual_ties': 0, 'predicted_wins': 0, 'predicted_losses': 0})
-    games_for_year = [
-        g for g in prediction_history
-        if g.get('year') and g.get('seasontype') and
-           int(g['year']) == year and int(g['seasontype']) == seasontype and
-           g.get('actual_winner') is not None and g.get('actual_winner') != ''
-    ]
-    all_teams = set(g['home_team'] for g in games_for_year) | set(g['away_team'] for g in games_for_year)
-    for team_abv in all_teams:
-        standings_data[team_abv]['team_name'] = teams_map.get(team_abv, team_abv)
-        standings_data[team_abv]['team_logo'] = team_logos.get(team_abv, PLACEHOLDER_LOGO)
-        home_games = [g for g in games_for_year if g['home_team'] == team_abv]
-        away_games = [g for g in games_for_year if g['away_team'] == team_abv]
-        for game in home_games + away_games:
-            is_home_team = (game['home_team'] == team_abv)
-            opponent = game['away_team'] if is_home_team else game['home_team']
-            if game['actual_winner'] == team_abv: standings_data[team_abv]['actual_wins'] += 1
-            elif game['actual_winner'] == opponent: standings_data[team_abv]['actual_losses'] += 1
-            else: standings_data[team_abv]['actual_ties'] += 1
-            if game.get('predicted_winner') == team_abv: standings_data[team_abv]['predicted_wins'] += 1
-            elif game.get('predicted_winner') == opponent: standings_data[team_abv]['predicted_losses'] += 1
-    for team, data in standings_data.items():
-        data['difference'] = data['actual_wins'] - data['predicted_wins']
-        data['actual_record'] = f"{data['actual_wins']}-{data['actual_losses']}" + (f"-{data['actual_ties']}" if data['actual_ties'] > 0 else "")
-        data['predicted_record'] = f"{data['predicted_wins']}-{data['predicted_losses']}"
+    standings_data = history_query.compute_standings(prediction_history.season(year, seasontype))
+    for team_abv, data in standings_data.items():
+        data['team_name'] = teams_map.get(team_abv, team_abv)
+        data['team_logo'] = team_logos.get(team_abv, PLACEHOLDER_LOGO)
     sorted_standings = dict(sorted(standings_data.items(), key=lambda item: item[1]['actual_wins'], reverse=True))
     return render_template('standings.html', standings=sorted_standings, selected_year=year, selected_seasontype=seasontype, firebase_config=firebase_config)
 
 # --- API Routes ---
 @app.route('/api/predict/<int:year>/<int:seasontype>/<int:week>')
 def get_predictions(year, seasontype, week):
-    games_for_week = [
-        g for g in prediction_history
-        if g.get('year') and g.get('seasontype') and g.get('week') and
-           int(g['year']) == year and int(g['seasontype']) == seasontype and int(g['week']) == week
-    ]
+    games_for_week = prediction_history.week(year, seasontype, week)
 
     if games_for_week:
         # Serve historical data, enriched with live scores for display
         print(f"Serving historical data for {year}, ST {seasontype}, Wk {week}.")
         live_data, _ = espn_api.get_weekly_schedule(year, seasontype, week)
-        live_events = {event['id']: event for event in live_data.get('events', [])} if live_data else {}
-        
-        predictions_list, correct, total = [], 0, 0
-        for game in games_for_week:
-            live_game = live_events.get(game['game_id'], {})
-            home_comp, away_comp = espn_api.parse_competitors(live_game)
-
-            game_info = {
-                "id": game['game_id'], "date": live_game.get('date', ''), "name": live_game.get('name', ''), 
-                "status": live_game.get('status', {}).get('type', {}).get('detail', 'Unavailable'),
-                "home_team": {"abbreviation": game['home_team'], "logo": team_logos.get(game['home_team'], PLACEHOLDER_LOGO), "score": home_comp.get('score', '0'), "win_probability": float(game.get('home_win_prob') or 0)},
-                "away_team": {"abbreviation": game['away_team'], "logo": team_logos.get(game['away_team'], PLACEHOLDER_LOGO), "score": away_comp.get('score', '0'), "win_probability": float(game.get('away_win_prob') or 0)},
-                "predicted_winner": game.get('predicted_winner'), "actual_winner": game.get('actual_winner'),
-                "is_correct": game.get('is_correct') == 'True'
-            }
-            if game.get('actual_winner'):
-                total += 1
-                if game.get('is_correct') == 'True': correct += 1
-            predictions_list.append(game_info)
-        
-        accuracy = {"correct": correct, "total": total, "percentage": (correct / total * 100) if total > 0 else 0}
-        return jsonify({"games": predictions_list, "accuracy": accuracy})
+        return jsonify(build_historical_week(year, seasontype, week, games_for_week, live_data))
     else:
         # Predict a future week
         result, status_code = predict_future_week(year, seasontype, week)
         return jsonify(result), status_code
 
+@app.route('/api/history')
+def get_history():
+    """
+    Streams prediction history as CSV or NDJSON with filters and cursor pagination.
+    The next page's cursor is returned in the 'X-Next-Cursor' header.
+    """
+    try:
+        filters = history_query.parse_filters(request.args)
+        cursor = max(request.args.get('cursor', 0, type=int), 0)
+        limit = request.args.get('limit', history_query.DEFAULT_LIMIT, type=int)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = min(max(limit, 1), history_query.MAX_LIMIT)
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({"error": "format must be 'csv' or 'ndjson'"}), 400
+
+    end, next_cursor = history_query.find_page_end(prediction_history, filters, cursor, limit)
+    rows = history_query.iter_page(prediction_history, filters, cursor, end)
+    if fmt == 'csv':
+        body = history_query.stream_csv(rows, FIELDNAMES)
+        mimetype = 'text/csv'
+    else:
+        body = history_query.stream_ndjson(rows, FIELDNAMES)
+        mimetype = 'application/x-ndjson'
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
+
+@app.route('/api/accuracy')
+def get_accuracy():
+    """
+    Serves one slice of the accuracy cube: all games by default, or filtered by
+    year, year+seasontype+week, team (optionally with year) or probability bucket.
+    """
+    year = request.args.get('year', type=int)
+    seasontype = request.args.get('seasontype', type=int)
+    week = request.args.get('week', type=int)
+    team = request.args.get('team')
+    bucket = request.args.get('bucket', type=int)
+    season_suffix = f':{year}' if year is not None else ''
+
+    if team:
+        key = f'team:{team.upper()}{season_suffix}'
+    elif bucket is not None:
+        key = f'bucket:{bucket}{season_suffix}'
+    elif year is not None and seasontype is not None and week is not None:
+        key = f'week:{year}:{seasontype}:{week}'
+    elif year is not None:
+        key = f'season:{year}'
+    else:
+        key = 'all'
+    return jsonify({"slice": key, **accuracy_cube.summary(key)})
+
+@app.route('/api/calibration')
+def get_calibration():
+    year = request.args.get('year', type=int)
+    return jsonify({"year": year, "points": accuracy_cube.calibration(year)})
+
+@app.route('/api/lms_schedule/<int:year>')
+def get_lms_season(year):
+    """
+    Provides the whole regular-season schedule for the Last Man Standing game from
+    the schedule index, keyed by week.
+    """
+    error = schedule_index.year_error(year)
+    if error:
+        return jsonify({"weeks": {}, "error": error}), 400
+    weeks, error = schedule.season(year)
+    if error:
+        return jsonify({"weeks": {}, "error": error}), 500
+    return jsonify({"year": year, "weeks": {
+        week: {"games": entry['games'], "first_kickoff": entry['first_kickoff']}
+        for week, entry in weeks.items()
+    }})
+
+def build_lms_week(year, week):
+    """Returns (payload, status_code) for one week of the LMS schedule."""
+    if not 1 <= week <= schedule_index.SEASON_WEEKS:
+        return {"games": [], "error": f"week must be between 1 and {schedule_index.SEASON_WEEKS}"}, 400
+    error = schedule_index.year_error(year)
+    if error:
+        return {"games": [], "error": error}, 400
+    entry, error = schedule.week(year, week)
+    if error:
+        return {"games": [], "error": error}, 500
+    status, _ = schedule.lock_status(year, week)
+    return {"games": entry['games'], **status}, 200
+
 @app.route('/api/lms_schedule/<int:year>/<int:week>')
 def get_lms_schedule(year, week):
     """
     Provides game schedule, including game start times, for the Last Man Standing game.
     """
-    data, error = espn_api.get_weekly_schedule(year, 2, week)
+    result, status_code = build_lms_week(year, week)
+    return jsonify(result), status_code
+
+@app.route('/api/lms_lock/<int:year>/<int:week>')
+def get_lms_lock(year, week):
+    """Whether picks for a week are locked (its first game has kicked off)."""
+    if not 1 <= week <= schedule_index.SEASON_WEEKS:
+        return jsonify({"error": f"week must be between 1 and {schedule_index.SEASON_WEEKS}"}), 400
+    error = schedule_index.year_error(year)
+    if error:
+        return jsonify({"error": error}), 400
+    status, error = schedule.lock_status(year, week)
     if error:
-        return jsonify({"games": [], "error": error}), 500
+        return jsonify({"error": error}), 500
+    return jsonify({"year": year, "week": week, **status})
+
+def get_matchup_matrix(week):
+    """The memory-mapped win-probability matrix for a prediction week and the current stats."""
+    matrix = matchup_cache.current(week, stats_version)
+    if matrix:
+        return matrix
+    # A miss hashes (and may rebuild from) the stats, which must not change meanwhile.
+    with stats_lock:
+        return matchup_cache.get(week, stats_version, latest_season_stats, current_season_stats,
+                                 PREDICTION_FORM, season_ratings if USE_RATINGS else None)
+
+@app.route('/api/matchups/<int:week>')
+def get_matchups(week):
+    """
+    Win probabilities for any pairing in a prediction week (19-22 are the playoffs):
+    ?home=BUF&away=KC for one game, ?team=BUF for a team against every opponent, or
+    the whole matrix (rows are home teams; ?format=binary for the raw float32 file).
+    """
+    if not latest_season_stats:
+        return jsonify({"error": "Missing base data for predictions."}), 500
+    if not 1 <= week <= 22:
+        return jsonify({"error": "week must be between 1 and 22"}), 400
+    matrix = get_matchup_matrix(week)
+
+    home, away, team = (request.args.get(key, '').upper() for key in ('home', 'away', 'team'))
+    if home and away:
+        home_prob = matrix.probability(home, away)
+        if home_prob is None:
+            return jsonify({"error": f"No matchup for {home} vs {away}."}), 404
+        return jsonify({"week": week, "version": matrix.version, "home_team": home, "away_team": away,
+                        "home_win_probability": home_prob, "away_win_probability": 1 - home_prob})
+    if team:
+        probabilities = matrix.team(team)
+        if probabilities is None:
+            return jsonify({"error": f"Unknown team '{team}'."}), 404
+        return jsonify({"week": week, "version": matrix.version, "team": team, **probabilities})
+    if request.args.get('format') == 'binary':
+        return Response(bytes(matrix.buffer), mimetype='application/octet-stream')
+    return jsonify({"week": week, "version": matrix.version, "teams": matrix.teams, "home_win_probability": matrix.rows()})
+
+def weekly_win_probabilities(year, week):
+    """Model win probability of every team playing in a regular-season week."""
+    entry, error = schedule.week(year, week)
+    if error:
+        return None, error
+
+    matrix = get_matchup_matrix(week)
+    win_probs = {}
+    for game in entry['games']:
+        if game['status'] == 'STATUS_FINAL':
+            continue
+        home_team_abv = game['home_team']['abbreviation']
+        away_team_abv = game['away_team']['abbreviation']
+        home_prob = matrix.probability(home_team_abv, away_team_abv)
+        if home_prob is not None:
+            win_probs[home_team_abv] = home_prob
+            win_probs[away_team_abv] = 1 - home_prob
+    return win_probs, None
+
+@app.route('/api/lms_optimize/<int:year>/<int:week>')
+def get_lms_optimize(year, week):
+    """
+    Suggests Last Man Standing picks for the next 'horizon' weeks that maximise the
+    chance of surviving all of them. Prior picks are passed as ?picks=BUF,KC,...
+    The search is time-bounded; 'optimal' is false when it stopped before proving
+    its best sequence optimal.
+    """
+    if not latest_season_stats:
+        return jsonify({"error": "Missing base data for predictions."}), 500
+    if not 1 <= week <= 18:
+        return jsonify({"error": "week must be between 1 and 18"}), 400
+    error = schedule_index.year_error(year)
+    if error:
+        return jsonify({"error": error}), 400
+    # Plan up to the end of the regular season by default.
+    horizon = min(max(request.args.get('horizon', 18, type=int), 1), 19 - week)
+    prior_picks = [team.strip().upper() for team in request.args.get('picks', '').split(',') if team.strip()]
+    division_of = {row['Team_Abv']: f"{row['Conference']} {row['Division']}" for row in divisions_map}
+
+    weeks = list(range(week, week + horizon))
+    weekly = []
+    for w in weeks:
+        # Stop at the first failure: with a cold index every further week would
+        # retry the whole season build.
+        win_probs, error = weekly_win_probabilities(year, w)
+        if error:
+            return jsonify({"error": f"Could not fetch live schedule: {error}"}), 500
+        weekly.append(win_probs)
+
+    survival, path, optimal = survivor.optimize_picks(weekly, prior_picks, division_of)
+    picks = [
+        {"week": weeks[index], "team": team, "win_probability": prob,
+         "division": division_of.get(team), "logo": team_logos.get(team, PLACEHOLDER_LOGO)}
+        for index, team, prob in path
+    ]
+    return jsonify({"year": year, "week": week, "horizon": horizon, "survival_probability": survival,
+                    "optimal": optimal, "picks": picks})
 
-    schedule_list = []
-    for game in data.get('events', []):
-        competitors = game.get('competitions', [{}])[0].get('competitors', [])
-        home_team_data = next((c.get('team', {}) for c in competitors if c.get('homeAway') == 'home'), {})
-        away_team_data = next((c.get('team', {}) for c in competitors if c.get('homeAway') == 'away'), {})
-        
-        home_team_abv = home_team_data.get('abbreviation')
-        away_team_abv = away_team_data.get('abbreviation')
-        
-        # --- NEW: Include the game's start time (in ISO 8601 format) ---
-        game_date = game.get('date')
-
-        if home_team_abv and away_team_abv:
-            schedule_list.append({
-                "date": game_date, 
-                "home_team": {"abbreviation": home_team_abv, "logo": team_logos.get(home_team_abv, PLACEHOLDER_LOGO)},
-                "away_team": {"abbreviation": away_team_abv, "logo": team_logos.get(away_team_abv, PLACEHOLDER_LOGO)}
-            })
-    return jsonify({"games": schedule_list})
+@app.route('/api/scenario', methods=['POST'])
+def post_scenario():
+    """
+    What-if standings and predictions. JSON body: {"year": 2025, "seasontype": 2,
+    "overrides": {"<game_id>": "<winner>", ...}, "week": <regular-season week to predict>}.
+    Games may be past (their result is flipped) or upcoming (they count as played).
+    Predictions use the current season's stats, so they are only made for that season.
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        year = int(body['year'])
+        seasontype = int(body.get('seasontype', 2))
+        overrides = {str(game_id): str(winner).upper() for game_id, winner in (body.get('overrides') or {}).items()}
+        week = int(body['week']) if body.get('week') is not None else None
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({"error": "Expected a JSON body with 'year', 'overrides' ({game_id: winner}) and optionally 'seasontype' and 'week'."}), 400
+    if not latest_season_stats:
+        return jsonify({"error": "Missing base data for predictions."}), 500
+    current_season = current_season_year()
+    if week is not None and year != current_season:
+        return jsonify({"error": f"Predictions are only available for the {current_season} season."}), 400
+
+    what_if = scenario.Scenario(prediction_history, year, seasontype, latest_season_stats, current_season_stats, season_ratings)
+    override_weeks = []
+    try:
+        for game_id, winner in overrides.items():
+            record = prediction_history.get(game_id)
+            scheduled = None
+            if record is None and seasontype == 2:
+                found = schedule.game(year, game_id)
+                if found:
+                    game_week, game = found
+                    scheduled = (game_week, game['home_team']['abbreviation'], game['away_team']['abbreviation'])
+            what_if.override(game_id, winner, scheduled)
+            override_weeks.append(record.week if record else scheduled[0])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    standings_data = what_if.standings()
+    for team_abv, data in standings_data.items():
+        data['team'] = team_abv
+        data['team_name'] = teams_map.get(team_abv, team_abv)
+        data['team_logo'] = team_logos.get(team_abv, PLACEHOLDER_LOGO)
+
+    # Predict the week after the latest overridden game unless a week is given.
+    if week is None and override_weeks and seasontype == 2 and year == current_season:
+        week = min(max(override_weeks) + 1, 18)
+    predictions = []
+    if week is not None and seasontype == 2:
+        entry, error = schedule.week(year, week)
+        if error:
+            return jsonify({"error": error}), 500
+        games = [(game['id'], game['home_team']['abbreviation'], game['away_team']['abbreviation'])
+                 for game in entry['games'] if game['id'] not in overrides]
+        predictions = what_if.predict(week, games, PREDICTION_FORM)
+
+    return jsonify({
+        "year": year, "seasontype": seasontype, "week": week,
+        "standings": sorted(standings_data.values(), key=lambda data: data['actual_wins'], reverse=True),
+        "predictions": predictions,
+        "unadjusted_games": what_if.unadjusted
+    })
 
 def find_season_start_date(year):
     """
@@ -390,6 +687,19 @@ def get_nfl_week():
 def get_nfl_divisions():
     return jsonify(divisions_map)
 
+@app.route('/api/espn_status')
+def get_espn_status():
+    """Circuit breaker state for the ESPN API client."""
+    return jsonify(espn_api.status())
+
+@app.route('/api/profiles')
+def get_profile_summary():
+    """Admin-only summary of the captured request profiles."""
+    if not profiler.is_admin_request():
+        abort(404)
+    limit = request.args.get('limit', 25, type=int)
+    return jsonify(profiler.summarize_profiles(limit))
+
 # --- App Startup ---
 load_all_data()
 
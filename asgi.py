@@ -0,0 +1,80 @@
+# asgi.py
+import asyncio
+import datetime
+
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, jsonify, render_template
+from werkzeug.exceptions import HTTPException
+
+import app as site
+import espn_async
+import profiler
+
+# Routes that wait on ESPN or Firebase are served by this async app, which awaits
+# those calls (concurrently where independent) and reuses the builders in app.py
+# for the CPU-bound work. Every other route falls through to the Flask app.
+async_app = Quart(__name__, template_folder='templates', static_folder='static')
+flask_asgi = WsgiToAsgi(site.app)
+profiler.init_quart_app(async_app)
+
+@async_app.route('/leaderboard')
+async def leaderboard():
+    year = datetime.date.today().year
+    try:
+        uid_to_email, all_players_data = await asyncio.gather(
+            asyncio.to_thread(site.list_user_emails),
+            asyncio.to_thread(site.get_lms_players, year)
+        )
+        board = site.build_leaderboard(uid_to_email, all_players_data)
+    except Exception as e:
+        print(f"An error occurred while calculating the leaderboard: {e}")
+        board = []
+    return await render_template('leaderboard.html', leaderboard=board, firebase_config=site.firebase_config)
+
+@async_app.route('/api/predict/<int:year>/<int:seasontype>/<int:week>')
+async def get_predictions(year, seasontype, week):
+    games_for_week = site.prediction_history.week(year, seasontype, week)
+
+    if games_for_week:
+        live_data, _ = await espn_async.get_weekly_schedule(year, seasontype, week)
+        return jsonify(site.build_historical_week(year, seasontype, week, games_for_week, live_data))
+
+    if not site.latest_season_stats:
+        return jsonify({"error": "Missing base data for predictions."}), 500
+    data, error = await espn_async.get_weekly_schedule(year, seasontype, week)
+    if error:
+        return jsonify({"error": f"Could not fetch live schedule: {error}"}), 500
+
+    game_ids = site.pending_boxscore_ids(data)
+    results = await asyncio.gather(*(espn_async.get_boxscore(game_id) for game_id in game_ids))
+    boxscores = {game_id: box_data for game_id, (box_data, _) in zip(game_ids, results)}
+    # Predicting and recording finished games writes files, so it runs off the event
+    # loop; build_future_week takes site.stats_lock around the shared state.
+    result, status_code = await asyncio.to_thread(site.build_future_week, year, seasontype, week, data, boxscores)
+    return jsonify(result), status_code
+
+@async_app.route('/api/lms_schedule/<int:year>/<int:week>')
+async def get_lms_schedule(year, week):
+    # Served from the schedule index; only its first build of a season does I/O.
+    result, status_code = await asyncio.to_thread(site.build_lms_week, year, week)
+    return jsonify(result), status_code
+
+@async_app.after_serving
+async def close_clients():
+    await espn_async.close()
+
+_async_routes = async_app.url_map.bind('')
+
+def is_async_route(scope):
+    try:
+        _async_routes.match(scope['path'], method=scope['method'])
+        return True
+    except HTTPException:
+        return False
+
+async def application(scope, receive, send):
+    """ASGI entry point, e.g. `hypercorn asgi:application`."""
+    if scope['type'] == 'http' and not is_async_route(scope):
+        await flask_asgi(scope, receive, send)
+    else:
+        await async_app(scope, receive, send)
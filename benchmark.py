@@ -0,0 +1,98 @@
+# benchmark.py
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import httpx
+
+# Two AFC East matchups, not started, so /api/predict predicts them without boxscores.
+STUB_GAMES = [('BUF', 'MIA'), ('NE', 'NYJ')]
+
+def stub_scoreboard():
+    events = []
+    for i, (home, away) in enumerate(STUB_GAMES):
+        events.append({
+            'id': f'stub{i}', 'date': '2030-09-12T17:00Z', 'name': f'{away} at {home}',
+            'status': {'type': {'name': 'STATUS_SCHEDULED', 'detail': 'Scheduled', 'completed': False}},
+            'competitions': [{'competitors': [
+                {'homeAway': 'home', 'team': {'abbreviation': home}, 'score': '0'},
+                {'homeAway': 'away', 'team': {'abbreviation': away}, 'score': '0'}
+            ]}]
+        })
+    return {'events': events}
+
+def run_stub(port, latency):
+    """Serves a fake ESPN API that answers every request after 'latency' seconds."""
+    payloads = {'/scoreboard': stub_scoreboard(), '/teams': {'sports': [{'leagues': [{'teams': []}]}]}, '/summary': {}}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            path = urlparse(self.path).path
+            body = json.dumps(next((data for suffix, data in payloads.items() if path.endswith(suffix)), {})).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    print(f"ESPN stub on http://127.0.0.1:{port} with {latency * 1000:.0f} ms latency.")
+    server.serve_forever()
+
+async def run_load(url, total, concurrency):
+    """Sends 'total' GETs to 'url' with at most 'concurrency' in flight."""
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{total} requests, concurrency {concurrency}: {total / elapsed:.1f} req/s, "
+          f"p50 {statistics.median(latencies) * 1000:.0f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms, {errors} errors")
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the WSGI and ASGI servers against a slow ESPN stub.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    stub = commands.add_parser('stub', help="Run a local ESPN stub (point ESPN_BASE_URL at it).")
+    stub.add_argument('--port', type=int, default=8001)
+    stub.add_argument('--latency-ms', type=float, default=300)
+    load = commands.add_parser('load', help="Send concurrent requests to a running server.")
+    load.add_argument('url', nargs='?', default='http://127.0.0.1:5000/api/predict/2030/2/1')
+    load.add_argument('--requests', type=int, default=400)
+    load.add_argument('--concurrency', type=int, default=100)
+    args = parser.parse_args()
+
+    if args.command == 'stub':
+        run_stub(args.port, args.latency_ms / 1000)
+    else:
+        asyncio.run(run_load(args.url, args.requests, args.concurrency))
+
+if __name__ == "__main__":
+    main()
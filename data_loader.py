@@ -1,53 +1,108 @@
 import csv
-from team import Team
+import json
+import os
+from team import Team, FORM_STATS
 
-def load_teams_from_csv(filepath):
+CURRENT_SEASON_STATS_FILE = 'current_season_stats.csv'
+FORM_WINDOW = 3          # Last-N window used when predicting with form='last_n'
+
+TEAM_FIELDNAMES = [
+    'Team_Abv', 'Total_GamesPlayed', 'Total_PassingYardsFor', 'Total_PassingYardsAgainst',
+    'Total_RushingYardsFor', 'Total_RushingYardsAgainst', 'Total_Takeaways', 'Total_Giveaways',
+    'Total_PointsFor', 'Total_PointsAgainst', 'Total_PassAttempts', 'Total_RushAttempts'
+]
+# Recency-weighted form columns, one per stat in team.FORM_STATS. Optional when loading.
+FORM_FIELDNAMES = [
+    'Form_PassingYardsFor', 'Form_PassingYardsAgainst', 'Form_RushingYardsFor', 'Form_RushingYardsAgainst',
+    'Form_Takeaways', 'Form_Giveaways', 'Form_PointsFor', 'Form_PointsAgainst',
+    'Form_PassAttempts', 'Form_RushAttempts'
+]
+# The last-N ring buffer as a JSON list of games (FORM_STATS order), oldest first. Optional when loading.
+RECENT_FIELDNAME = 'Recent_Games'
+
+def team_from_row(row, form_window=0):
+    """
+    Builds a Team from a row using the stats CSV column names.
+    """
+    form = {stat: float(row[column]) for stat, column in zip(FORM_STATS, FORM_FIELDNAMES) if row.get(column) not in (None, '')}
+    recent = json.loads(row[RECENT_FIELDNAME]) if form_window > 0 and row.get(RECENT_FIELDNAME) else None
+    return Team(
+        pyds_for=float(row.get('Total_PassingYardsFor', 0)),
+        pyds_agst=float(row.get('Total_PassingYardsAgainst', 0)),
+        ryds_for=float(row.get('Total_RushingYardsFor', 0)),
+        ryds_agst=float(row.get('Total_RushingYardsAgainst', 0)),
+        takeaways=float(row.get('Total_Takeaways', 0)),
+        giveaways=float(row.get('Total_Giveaways', 0)),
+        points_for=float(row.get('Total_PointsFor', 0)),
+        points_agst=float(row.get('Total_PointsAgainst', 0)),
+        pass_attempts=float(row.get('Total_PassAttempts', 0)),
+        rush_attempts=float(row.get('Total_RushAttempts', 0)),
+        games=float(row.get('Total_GamesPlayed', 0)),
+        form=form,
+        form_window=form_window,
+        recent=recent
+    )
+
+def team_to_row(abv, team):
+    """
+    Converts a Team into a row using the stats CSV column names.
+    """
+    row = {
+        'Team_Abv': abv,
+        'Total_GamesPlayed': team.games,
+        'Total_PassingYardsFor': team.pyds_for,
+        'Total_PassingYardsAgainst': team.pyds_agst,
+        'Total_RushingYardsFor': team.ryds_for,
+        'Total_RushingYardsAgainst': team.ryds_agst,
+        'Total_Takeaways': team.takeaways,
+        'Total_Giveaways': team.giveaways,
+        'Total_PointsFor': team.points_for,
+        'Total_PointsAgainst': team.points_agst,
+        'Total_PassAttempts': team.pass_attempts,
+        'Total_RushAttempts': team.rush_attempts
+    }
+    for stat, column in zip(FORM_STATS, FORM_FIELDNAMES):
+        row[column] = team.form_avg(stat)
+    row[RECENT_FIELDNAME] = json.dumps([list(game) for game in team.recent]) if team.recent else ''
+    return row
+
+def load_teams_from_csv(filepath, form_window=0):
     teams = {}
     with open(filepath, newline='') as csvfile:
         reader = csv.DictReader(csvfile)
         for row in reader:
-            name = row['Team_Abv']
-            t = Team(
-                pyds_for=float(row.get('Total_PassingYardsFor', 0)),
-                pyds_agst=float(row.get('Total_PassingYardsAgainst', 0)),
-                ryds_for=float(row.get('Total_RushingYardsFor', 0)),
-                ryds_agst=float(row.get('Total_RushingYardsAgainst', 0)),
-                takeaways=float(row.get('Total_Takeaways', 0)),
-                giveaways=float(row.get('Total_Giveaways', 0)),
-                points_for=float(row.get('Total_PointsFor', 0)),
-                points_agst=float(row.get('Total_PointsAgainst', 0)),
-                pass_attempts=float(row.get('Total_PassAttempts', 0)),
-                rush_attempts=float(row.get('Total_RushAttempts', 0)),
-                games=float(row.get('Total_GamesPlayed', 0))
-            )
-            teams[name] = t
+            teams[row['Team_Abv']] = team_from_row(row, form_window)
     return teams
 
+def load_current_season_stats(filepath=CURRENT_SEASON_STATS_FILE, form_window=FORM_WINDOW):
+    """
+    The in-progress season stats with their last-N window, or a zeroed team for
+    every team if the season hasn't been written yet.
+    """
+    try:
+        teams = load_teams_from_csv(filepath, form_window)
+        print(f"Loaded in-progress season stats from '{filepath}'.")
+    except FileNotFoundError:
+        print(f"'{filepath}' not found. Initializing empty stats.")
+        teams = load_teams_from_csv('team_abv.csv', form_window)
+    return teams
+
+def prediction_settings():
+    """
+    The form mode ('ewma', 'last_n' or None) and whether to use opponent-adjusted
+    ratings, from PREDICTION_FORM and PREDICTION_RATINGS. Everything that predicts
+    live games reads them here so the app and the offline jobs agree.
+    """
+    form = os.environ.get('PREDICTION_FORM') or None
+    use_ratings = os.environ.get('PREDICTION_RATINGS', '').lower() in ('1', 'true')
+    return form, use_ratings
+
 def save_teams_to_csv(teams, filename):
     """
     Save the teams dictionary to a CSV file with the correct columns.
     """
-    fieldnames = [
-        'Team_Abv', 'Total_GamesPlayed', 'Total_PassingYardsFor', 'Total_PassingYardsAgainst',
-        'Total_RushingYardsFor', 'Total_RushingYardsAgainst', 'Total_Takeaways', 'Total_Giveaways',
-        'Total_PointsFor', 'Total_PointsAgainst', 'Total_PassAttempts', 'Total_RushAttempts'
-    ]
     with open(filename, 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=TEAM_FIELDNAMES + FORM_FIELDNAMES + [RECENT_FIELDNAME])
         writer.writeheader()
         for abv, team in teams.items():
-            row = {
-                'Team_Abv': abv,
-                'Total_GamesPlayed': team.games,
-                'Total_PassingYardsFor': team.pyds_for,
-                'Total_PassingYardsAgainst': team.pyds_agst,
-                'Total_RushingYardsFor': team.ryds_for,
-                'Total_RushingYardsAgainst': team.ryds_agst,
-                'Total_Takeaways': team.takeaways,
-                'Total_Giveaways': team.giveaways,
-                'Total_PointsFor': team.points_for,
-                'Total_PointsAgainst': team.points_agst,
-                'Total_PassAttempts': team.pass_attempts,
-                'Total_RushAttempts': team.rush_attempts
-            }
-            writer.writerow(row)
\ No newline at end of file
+            writer.writerow(team_to_row(abv, team))
\ No newline at end of file
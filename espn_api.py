@@ -1,19 +1,198 @@
 # espn_api.py
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
 import requests
 
-BASE_URL = "https://site.api.espn.com/apis/site/v2/sports/football/nfl"
+BASE_URL = os.environ.get("ESPN_BASE_URL", "https://site.api.espn.com/apis/site/v2/sports/football/nfl")
+
+CONNECT_TIMEOUT = 3.05   # Seconds to establish a connection
+READ_TIMEOUT = 5.0       # Seconds to wait for each chunk of the response
+DEADLINE_SECONDS = 8.0   # Budget for one call including retries and backoff (see _get_once)
+READ_CHUNK_SIZE = 64 * 1024
+MAX_RETRIES = 2          # Extra attempts after the first for retryable failures
+BACKOFF_BASE = 0.25      # Backoff before retry n is uniform in [0, base * 2**n]
+BACKOFF_CAP = 2.0
+FAILURE_THRESHOLD = 5    # Consecutive failed calls that open the circuit
+RESET_SECONDS = 30.0     # Time the circuit stays open before a trial call
+STALE_CACHE_SIZE = 256   # Last good payloads kept per URL for serving while ESPN is down
+
+class TransientError(Exception):
+    """A failure worth retrying: timeouts, connection errors, 429 and 5xx."""
+
+class CircuitBreaker:
+    """
+    Counts consecutive failed calls. After FAILURE_THRESHOLD it opens and calls fail
+    fast; after RESET_SECONDS one trial call is let through (half-open), which
+    closes the circuit on success or re-opens it on failure. A trial that ends
+    without either (e.g. a cancelled request) must be released with abandon_trial,
+    or the circuit would stay half-open and reject every call.
+    """
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.counts = {'success': 0, 'failure': 0, 'rejected': 0, 'stale_served': 0}
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """
+        'closed' or 'half_open' (the state the call was let through in), or None
+        when the call is rejected.
+        """
+        with self.lock:
+            if self.state == 'open' and time.time() - self.opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+            if self.state == 'closed':
+                return 'closed'
+            if self.state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return 'half_open'
+            self.counts['rejected'] += 1
+            return None
+
+    def abandon_trial(self):
+        """Counts a trial call that never recorded a result as a failure."""
+        with self.lock:
+            if self.state == 'half_open' and self.trial_in_flight:
+                self.state, self.opened_at = 'open', time.time()
+                self.failures += 1
+                self.counts['failure'] += 1
+                print("ESPN circuit re-opened after an unfinished trial call.")
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self.lock:
+            self.state, self.failures, self.opened_at = 'closed', 0, None
+            self.trial_in_flight = False
+            self.counts['success'] += 1
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.counts['failure'] += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"ESPN circuit opened after {self.failures} consecutive failures.")
+                self.state, self.opened_at = 'open', time.time()
+            self.trial_in_flight = False
+
+    def status(self):
+        with self.lock:
+            retry_in = None
+            if self.state == 'open':
+                retry_in = max(0.0, self.reset_seconds - (time.time() - self.opened_at))
+            return {'state': self.state, 'consecutive_failures': self.failures,
+                    'retry_in_seconds': retry_in, **self.counts}
+
+breaker = CircuitBreaker()
+_last_good = OrderedDict()   # url -> (payload, fetched_at)
+_last_good_lock = threading.Lock()
+
+def remember(url, data):
+    with _last_good_lock:
+        _last_good[url] = (data, time.time())
+        _last_good.move_to_end(url)
+        while len(_last_good) > STALE_CACHE_SIZE:
+            _last_good.popitem(last=False)
+
+def stale_or_error(url, error):
+    """
+    The last good payload for a URL, as a copy marked 'stale' with its fetch time,
+    or the error when there is none.
+    """
+    with _last_good_lock:
+        cached = _last_good.get(url)
+    if cached is None:
+        return None, error
+    data, fetched_at = cached
+    with breaker.lock:
+        breaker.counts['stale_served'] += 1
+    print(f"Serving stale data for {url} ({error}).")
+    return {**data, 'stale': True, 'fetched_at': fetched_at}, None
+
+def backoff(attempt, deadline):
+    """Jittered delay before retry 'attempt', or None if it would pass the deadline."""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    if time.monotonic() + delay >= deadline:
+        return None
+    return delay
+
+def status():
+    """Breaker state and stale-cache size, for monitoring."""
+    with _last_good_lock:
+        cached = len(_last_good)
+    return {**breaker.status(), 'cached_payloads': cached}
+
+def _get_once(url, deadline):
+    """
+    One GET, with the body streamed so the deadline also covers a slow-dripping
+    response. requests can only time out a single socket read, so the deadline is
+    checked between chunks: a call can overrun it by at most one read timeout.
+    """
+    remaining = deadline - time.monotonic()
+    try:
+        response = requests.get(url, stream=True,
+                                timeout=(min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining)))
+    except (requests.Timeout, requests.ConnectionError) as e:
+        raise TransientError(str(e))
+    with response:
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientError(f"{response.status_code} Server Error for url: {url}")
+        response.raise_for_status()
+        chunks = []
+        try:
+            for chunk in response.iter_content(READ_CHUNK_SIZE):
+                chunks.append(chunk)
+                if time.monotonic() >= deadline:
+                    raise TransientError(f"Deadline exceeded reading {url}")
+        except (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+            raise TransientError(str(e))
+    return json.loads(b''.join(chunks))
 
 def _fetch_json(url):
     """
     Generic helper to fetch and parse JSON from a URL, with error handling.
+    Retries transient failures with jittered backoff within DEADLINE_SECONDS, and
+    falls back to the last good payload (marked stale) on failure or while the
+    circuit breaker is open.
     """
+    admitted = breaker.allow()
+    if not admitted:
+        return stale_or_error(url, "ESPN circuit breaker is open")
+
+    deadline = time.monotonic() + DEADLINE_SECONDS
+    attempt = 0
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json(), None
-    except requests.RequestException as e:
-        print(f"Could not fetch data from {url}: {e}")
-        return None, str(e)
+        while True:
+            try:
+                data = _get_once(url, deadline)
+                breaker.record_success()
+                remember(url, data)
+                return data, None
+            except TransientError as e:
+                delay = backoff(attempt, deadline) if attempt < MAX_RETRIES else None
+                if delay is None:
+                    print(f"Could not fetch data from {url}: {e}")
+                    breaker.record_failure()
+                    return stale_or_error(url, str(e))
+                attempt += 1
+                time.sleep(delay)
+            except (requests.RequestException, ValueError) as e:
+                # Not retryable (4xx, bad JSON) and not a sign ESPN is down.
+                print(f"Could not fetch data from {url}: {e}")
+                breaker.record_success()
+                return None, str(e)
+    finally:
+        if admitted == 'half_open':
+            breaker.abandon_trial()
 
 def get_weekly_schedule(year, seasontype, week):
     """
@@ -0,0 +1,89 @@
+# espn_async.py
+import asyncio
+import time
+
+import httpx
+
+import espn_api
+from espn_api import BASE_URL, TransientError
+
+# One pooled client per process, created lazily inside the running event loop.
+_client = None
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=httpx.Timeout(espn_api.READ_TIMEOUT, connect=espn_api.CONNECT_TIMEOUT)
+        )
+    return _client
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def _get_once(url, remaining):
+    try:
+        async with asyncio.timeout(remaining):
+            response = await _get_client().get(url)
+    except (TimeoutError, httpx.TimeoutException, httpx.TransportError) as e:
+        raise TransientError(str(e) or "timed out")
+    if response.status_code == 429 or response.status_code >= 500:
+        raise TransientError(f"{response.status_code} Server Error for url: {url}")
+    response.raise_for_status()
+    return response.json()
+
+async def _fetch_json(url):
+    """
+    Async counterpart of espn_api._fetch_json, sharing its circuit breaker and
+    last-good payloads; returns (data, error) the same way. The whole request,
+    body included, is bounded by DEADLINE_SECONDS.
+    """
+    admitted = espn_api.breaker.allow()
+    if not admitted:
+        return espn_api.stale_or_error(url, "ESPN circuit breaker is open")
+
+    deadline = time.monotonic() + espn_api.DEADLINE_SECONDS
+    attempt = 0
+    try:
+        while True:
+            try:
+                data = await _get_once(url, deadline - time.monotonic())
+                espn_api.breaker.record_success()
+                espn_api.remember(url, data)
+                return data, None
+            except TransientError as e:
+                delay = espn_api.backoff(attempt, deadline) if attempt < espn_api.MAX_RETRIES else None
+                if delay is None:
+                    print(f"Could not fetch data from {url}: {e}")
+                    espn_api.breaker.record_failure()
+                    return espn_api.stale_or_error(url, str(e))
+                attempt += 1
+                await asyncio.sleep(delay)
+            except (httpx.HTTPError, ValueError) as e:
+                # Not retryable (4xx, bad JSON) and not a sign ESPN is down.
+                print(f"Could not fetch data from {url}: {e}")
+                espn_api.breaker.record_success()
+                return None, str(e)
+    finally:
+        # Also reached when the request is cancelled (client disconnect), which
+        # records neither success nor failure.
+        if admitted == 'half_open':
+            espn_api.breaker.abandon_trial()
+
+async def get_weekly_schedule(year, seasontype, week):
+    """
+    Fetches the full schedule for a given week from the ESPN API.
+    """
+    url = f"{BASE_URL}/scoreboard?limit=1000&seasontype={seasontype}&dates={year}&week={week}"
+    return await _fetch_json(url)
+
+async def get_boxscore(game_id):
+    """
+    Fetches the boxscore/summary for a specific game ID.
+    """
+    url = f"{BASE_URL}/summary?event={game_id}"
+    return await _fetch_json(url)
@@ -1,88 +1,359 @@
 # history_generator.py
+import argparse
 import csv
 import copy
-from data_loader import load_teams_from_csv, save_teams_to_csv
+import datetime
+import json
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from data_loader import (
+    load_teams_from_csv, save_teams_to_csv, team_from_row, team_to_row,
+    CURRENT_SEASON_STATS_FILE, FORM_WINDOW
+)
+from history_store import FIELDNAMES
 from predict import predict_winner
 from team import parse_game_json
+from ratings import RatingsEngine, save_ratings
 import espn_api # Use the new centralized API module
 
-def generate_prediction_history():
-    fieldnames = [
-        'year', 'seasontype', 'week', 'game_id', 'home_team', 'away_team', 
-        'predicted_winner', 'actual_winner', 'home_win_prob', 'away_win_prob', 'is_correct'
-    ]
-    
-    with open('prediction_history.csv', 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
+HISTORY_FILE = 'prediction_history.csv'
+CHECKPOINT_FILE = 'history_checkpoint.json'
+TAIL_FILE = 'prediction_history.tail.csv'  # Rows set aside while a run rewrites the end of the history
+FINAL_STATS_FILE = 'final_team_stats.csv'
+FIRST_YEAR = 2022
+LAST_YEAR = 2024
+PREFETCH_WEEKS = 3       # How many weeks the producer may run ahead of the predictor
+BOXSCORE_WORKERS = 8     # Concurrent boxscore fetches within a prefetched week
 
+def current_season_year(today=None):
+    """The season that started in the most recent August/September (January playoffs count for the previous year)."""
+    today = today or datetime.date.today()
+    return today.year if today.month >= 8 else today.year - 1
+
+def is_completed(game):
+    return game.get('status', {}).get('type', {}).get('completed', False)
+
+def is_finished(game):
+    """Completed, or canceled (e.g. 2022 W17 CIN-BUF) and so never going to complete."""
+    return is_completed(game) or game.get('status', {}).get('type', {}).get('name') == 'STATUS_CANCELED'
+
+def week_plan(start_year, end_year, after=None):
+    """
+    Yields (year, seasontype, week) for every week to process, skipping the Pro Bowl
+    and anything at or before the 'after' checkpoint.
+    """
+    for year in range(start_year, end_year + 1):
+        for seasontype in [2, 3]: # 2: Regular, 3: Postseason
+            week_range = range(1, 19) if seasontype == 2 else range(1, 6)
+            for week in week_range:
+                if seasontype == 3 and week == 4: # Skip Pro Bowl
+                    continue
+                if after and (year, seasontype, week) <= after:
+                    continue
+                yield year, seasontype, week
+
+# --- Checkpointing ---
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"WARNING: Ignoring unreadable checkpoint '{path}': {e}")
+        return None
+
+def save_checkpoint(season, last_week, rows_written, old_teams, new_teams, season_ratings, path=CHECKPOINT_FILE):
+    """Atomically records the state after a fully processed week."""
+    checkpoint = {
+        'season': season,
+        'last_week': list(last_week),
+        'rows_written': rows_written,
+        'old_teams': [team_to_row(abv, t) for abv, t in old_teams.items()],
+        'new_teams': [team_to_row(abv, t) for abv, t in new_teams.items()],
+        'ratings': season_ratings.to_dict()
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def teams_from_checkpoint(rows):
+    return {row['Team_Abv']: team_from_row(row, FORM_WINDOW) for row in rows}
+
+def truncate_history(path, rows, tail_path=TAIL_FILE):
+    """
+    Cuts the history back to the 'rows' checkpointed rows and returns the rows after
+    them as dicts. Those are a week interrupted mid-write or games the running app
+    appended since (app.append_to_history); the caller re-appends the ones it does
+    not write again and then deletes 'tail_path'.
+
+    The rows are saved to 'tail_path' before the file is cut, so a run that dies
+    before re-appending them does not lose them: the next run picks them up from
+    there. Rows are deduped by game_id, and games already in the checkpointed rows
+    are dropped.
+    """
+    game_id = FIELDNAMES.index('game_id')
+    tail = []
+    if os.path.isfile(tail_path):
+        with open(tail_path, newline='') as f:
+            tail = list(csv.DictReader(f, fieldnames=FIELDNAMES))
+
+    with open(path, 'r+', newline='') as f:
+        lines = []
+        for _ in range(rows + 1): # +1 for the header
+            line = f.readline()
+            if not line:
+                break
+            lines.append(line)
+        seen = {row[game_id] for row in csv.reader(lines[1:]) if len(row) > game_id}
+        offset = f.tell()
+        tail.extend(csv.DictReader(f, fieldnames=FIELDNAMES))
+
+        kept = []
+        for row in tail:
+            if row['game_id'] not in seen:
+                seen.add(row['game_id'])
+                kept.append(row)
+        tmp_path = f"{tail_path}.tmp"
+        with open(tmp_path, 'w', newline='') as tail_file:
+            csv.DictWriter(tail_file, fieldnames=FIELDNAMES).writerows(kept)
+            tail_file.flush()
+            os.fsync(tail_file.fileno())
+        os.replace(tmp_path, tail_path)
+
+        f.seek(offset)
+        f.truncate()
+    return kept
+
+# --- Pipeline ---
+
+def _put(out_queue, item, stop_event):
+    while not stop_event.is_set():
+        try:
+            out_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def prefetch_weeks(plan, out_queue, stop_event):
+    """
+    Producer: fetches each week's schedule and the boxscores of its completed games
+    ahead of the predictor. Items are (week_key, events, boxscores, error); a
+    failed fetch is sent with its error and ends the stream, so the week is retried
+    on the next run instead of being skipped. Ends the stream with a None sentinel.
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=BOXSCORE_WORKERS) as pool:
+            postseason_over = None
+            for year, seasontype, week in plan:
+                if stop_event.is_set():
+                    return
+                if seasontype == 3 and postseason_over == year:
+                    continue
+                week_key = (year, seasontype, week)
+
+                weekly_data, error = espn_api.get_weekly_schedule(year, seasontype, week)
+                if error or not weekly_data:
+                    _put(out_queue, (week_key, None, None, f"could not fetch schedule: {error}"), stop_event)
+                    return
+                if not weekly_data.get('events'):
+                    if seasontype == 3:
+                        postseason_over = year # End postseason if no more games
+                        continue
+                    _put(out_queue, (week_key, None, None, "schedule has no games"), stop_event)
+                    return
+
+                events = weekly_data['events']
+                completed_ids = [game.get('id') for game in events if is_completed(game)]
+                boxscores = dict(zip(completed_ids, pool.map(espn_api.get_boxscore, completed_ids)))
+                missing = [game_id for game_id, (_, box_error) in boxscores.items() if box_error]
+                if missing:
+                    _put(out_queue, (week_key, None, None, f"could not fetch boxscores for games {', '.join(missing)}"), stop_event)
+                    return
+                if not _put(out_queue, (week_key, events, boxscores, None), stop_event):
+                    return
+    finally:
+        _put(out_queue, None, stop_event)
+
+def predict_week(year, seasontype, week, events, old_teams, new_teams, form=None, season_ratings=None):
+    """Phase 1: Make predictions for all games in the week."""
+    rows = []
+    for game in events:
+        game_id = game.get('id')
+        home_team_data, away_team_data = espn_api.parse_competitors(game)
+        if not home_team_data or not away_team_data: continue
+
+        home_team_abv = home_team_data.get('team', {}).get('abbreviation')
+        away_team_abv = away_team_data.get('team', {}).get('abbreviation')
+
+        prediction_week = week if seasontype == 2 else 18 + week
+        predicted_winner, home_prob, away_prob = predict_winner(
+            home_team_abv, away_team_abv, old_teams, new_teams,
+            prediction_week, home_team_abv, form, season_ratings
+        )
+
+        actual_winner, is_correct = None, None
+        if is_completed(game):
+            actual_winner = home_team_abv if home_team_data.get('winner') else (away_team_abv if away_team_data.get('winner') else None)
+            if predicted_winner and actual_winner:
+                is_correct = (predicted_winner == actual_winner)
+
+        rows.append({
+            'year': year, 'seasontype': seasontype, 'week': week, 'game_id': game_id,
+            'home_team': home_team_abv, 'away_team': away_team_abv,
+            'predicted_winner': predicted_winner, 'actual_winner': actual_winner,
+            'home_win_prob': home_prob, 'away_win_prob': away_prob, 'is_correct': is_correct
+        })
+    return rows
+
+def ingest_week(events, boxscores, new_teams, season_ratings):
+    """Phase 2: Update team stats and the season's ratings from completed games."""
+    for game in events:
+        if not is_completed(game):
+            continue
+        game_id = game.get('id')
+        box_data, _ = boxscores[game_id]
+        parsed_game = parse_game_json(box_data, new_teams)
+        if parsed_game:
+            season_ratings.add_game(parsed_game, game_id)
+    # Warm-started from last week's solution, so only a few sweeps are needed.
+    season_ratings.solve()
+
+def generate_prediction_history(extend=False, fresh=False, form=None, use_ratings=False):
+    """
+    Builds prediction_history.csv week by week while a producer thread prefetches
+    upcoming weeks. Progress is checkpointed after every week, so an interrupted run
+    resumes where it stopped. With extend=True only newly completed weeks and seasons
+    (up to the current one) are appended. 'form' selects recency-weighted inputs
+    ('ewma' or 'last_n') for the current season and use_ratings predicts from
+    opponent-adjusted ratings once teams have enough games.
+
+    Processing stops at the first incomplete week of the current season (canceled
+    games count as finished), and at any week whose schedule or boxscores could not
+    be fetched; that week is not checkpointed, so the next run retries it. Returns
+    False after a failed fetch.
+
+    Rows after the checkpointed ones (e.g. games the app recorded live) are kept at
+    the end of the file, outside the checkpointed row count, unless this run writes
+    the same games again.
+    """
+    checkpoint = None if fresh else load_checkpoint()
+    if checkpoint and not os.path.isfile(HISTORY_FILE):
+        print(f"WARNING: Checkpoint found but '{HISTORY_FILE}' is missing; starting over.")
+        checkpoint = None
+    if extend and checkpoint is None:
+        print(f"No checkpoint found in '{CHECKPOINT_FILE}'; regenerating history from {FIRST_YEAR}.")
+
+    if checkpoint:
+        old_teams = teams_from_checkpoint(checkpoint['old_teams'])
+        new_teams = teams_from_checkpoint(checkpoint['new_teams'])
+        season_ratings = RatingsEngine.from_dict(checkpoint.get('ratings', {}))
+        season = checkpoint['season']
+        rows_written = checkpoint['rows_written']
+        last_week = tuple(checkpoint['last_week'])
+        unchecked_rows = truncate_history(HISTORY_FILE, rows_written)
+        print(f"Resuming after {last_week} with {rows_written} rows already written.")
+    else:
         old_teams = load_teams_from_csv('nfl2021.csv')
+        new_teams = load_teams_from_csv('team_abv.csv', FORM_WINDOW)
+        season_ratings = RatingsEngine()
+        season = FIRST_YEAR
+        rows_written = 0
+        last_week = None
+        unchecked_rows = []
+
+    current_season = current_season_year()
+    end_year = current_season if extend else max(LAST_YEAR, season)
+    plan = week_plan(FIRST_YEAR, end_year, after=last_week)
+
+    week_queue = queue.Queue(maxsize=PREFETCH_WEEKS)
+    stop_event = threading.Event()
+    producer = threading.Thread(target=prefetch_weeks, args=(plan, week_queue, stop_event), daemon=True)
+    producer.start()
+
+    stopped_early = False
+    failed = False
+    written_ids = set()
+    with open(HISTORY_FILE, 'a' if checkpoint else 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        if not checkpoint:
+            writer.writeheader()
+
+        try:
+            while True:
+                item = week_queue.get()
+                if item is None:
+                    break
+                (year, seasontype, week), events, boxscores, error = item
+                if error:
+                    print(f"    {year}, Seasontype {seasontype}, Week {week}: {error}. Stopping; rerun to retry this week.")
+                    failed = True
+                    break
+
+                if year != season:
+                    # The previous season is finished: it becomes the baseline for the next one.
+                    print(f"\n--- Processing Year: {year} ---")
+                    save_teams_to_csv(new_teams, FINAL_STATS_FILE)
+                    old_teams = copy.deepcopy(new_teams)
+                    new_teams = load_teams_from_csv('team_abv.csv', FORM_WINDOW)
+                    season_ratings = RatingsEngine()
+                    season = year
+
+                # An in-progress season is only processed up to its last completed week,
+                # whether or not this is an --extend run.
+                if year >= current_season and not all(is_finished(game) for game in events):
+                    print(f"    {year}, Seasontype {seasontype}, Week {week} is not complete yet. Stopping.")
+                    stopped_early = True
+                    break
 
-        for year in range(2022, 2025):
-            print(f"\n--- Processing Year: {year} ---")
-            new_teams = load_teams_from_csv('team_abv.csv')
-            
-            for seasontype in [2, 3]: # 2: Regular, 3: Postseason
                 season_name = "Regular Season" if seasontype == 2 else "Postseason"
-                week_range = range(1, 19) if seasontype == 2 else range(1, 6)
-                
-                print(f"  -- Processing {season_name} --")
+                print(f"    Processing {year}, {season_name}, Week {week}...")
 
-                for week in week_range:
-                    if seasontype == 3 and week == 4: # Skip Pro Bowl
-                        continue
+                rows = predict_week(year, seasontype, week, events, old_teams, new_teams, form,
+                                    season_ratings if use_ratings else None)
+                writer.writerows(rows)
+                csvfile.flush()
+                os.fsync(csvfile.fileno())
+                rows_written += len(rows)
+                written_ids.update(row['game_id'] for row in rows)
 
-                    print(f"    Processing {year}, {season_name}, Week {week}...")
-                    
-                    weekly_data, error = espn_api.get_weekly_schedule(year, seasontype, week)
-                    if error or not weekly_data or not weekly_data.get('events'):
-                        if seasontype == 3: break # End postseason if no more games
-                        continue
+                ingest_week(events, boxscores, new_teams, season_ratings)
+                save_checkpoint(season, (year, seasontype, week), rows_written, old_teams, new_teams, season_ratings)
+        finally:
+            stop_event.set()
+            # After the last checkpointed row, so the next resume sets them aside again.
+            # Games this run wrote itself replace the set-aside copies.
+            writer.writerows(row for row in unchecked_rows if row['game_id'] not in written_ids)
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+            if checkpoint and os.path.isfile(TAIL_FILE):
+                os.remove(TAIL_FILE)
 
-                    events = weekly_data['events']
-                    
-                    # Phase 1: Make predictions for all games in the week
-                    for game in events:
-                        game_id = game.get('id')
-                        home_team_data, away_team_data = espn_api.parse_competitors(game)
-                        if not home_team_data or not away_team_data: continue
-
-                        home_team_abv = home_team_data.get('team', {}).get('abbreviation')
-                        away_team_abv = away_team_data.get('team', {}).get('abbreviation')
-
-                        prediction_week = week if seasontype == 2 else 18 + week
-                        predicted_winner, home_prob, away_prob = predict_winner(
-                            home_team_abv, away_team_abv, old_teams, new_teams, 
-                            prediction_week, home_team_abv
-                        )
-                        
-                        actual_winner, is_correct = None, None
-                        if game.get('status', {}).get('type', {}).get('completed', False):
-                            actual_winner = home_team_abv if home_team_data.get('winner') else (away_team_abv if away_team_data.get('winner') else None)
-                            if predicted_winner and actual_winner:
-                                is_correct = (predicted_winner == actual_winner)
-
-                        writer.writerow({
-                            'year': year, 'seasontype': seasontype, 'week': week, 'game_id': game_id,
-                            'home_team': home_team_abv, 'away_team': away_team_abv,
-                            'predicted_winner': predicted_winner, 'actual_winner': actual_winner,
-                            'home_win_prob': home_prob, 'away_win_prob': away_prob, 'is_correct': is_correct
-                        })
-                    
-                    # Phase 2: Update team stats from completed games
-                    for game in events:
-                        if game.get('status', {}).get('type', {}).get('completed', False):
-                            game_id = game.get('id')
-                            box_data, box_error = espn_api.get_boxscore(game_id)
-                            if box_error:
-                                print(f"      Could not get boxscore for {game_id}: {box_error}")
-                                continue
-                            parse_game_json(box_data, new_teams)
-            
-            old_teams = copy.deepcopy(new_teams)
-        
-        save_teams_to_csv(new_teams, 'final_team_stats.csv')
+    if failed:
+        # The checkpoint still ends at the last complete week; leave the stats files alone.
+        print("\nPrediction history generation stopped early after a failed fetch.")
+        return False
+    if stopped_early:
+        # Mid-season: hand the in-progress stats to the app instead of overwriting last season's.
+        save_teams_to_csv(new_teams, CURRENT_SEASON_STATS_FILE)
+        save_ratings(season_ratings)
+    else:
+        save_teams_to_csv(new_teams, FINAL_STATS_FILE)
     print("\nPrediction history generation complete!")
+    return True
 
 if __name__ == '__main__':
-    generate_prediction_history()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the model's prediction history.")
+    parser.add_argument('--extend', action='store_true', help="Append only newly completed weeks and seasons.")
+    parser.add_argument('--fresh', action='store_true', help="Ignore any checkpoint and regenerate from scratch.")
+    parser.add_argument('--form', choices=['ewma', 'last_n'], help="Use recency-weighted current-season stats.")
+    parser.add_argument('--ratings', action='store_true', help="Predict from opponent-adjusted ratings.")
+    args = parser.parse_args()
+    if not generate_prediction_history(extend=args.extend, fresh=args.fresh, form=args.form, use_ratings=args.ratings):
+        sys.exit(1)
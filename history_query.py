@@ -0,0 +1,114 @@
+# history_query.py
+import csv
+import io
+import json
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 100000
+
+def parse_filters(args):
+    """
+    Reads the history filters from request query arguments.
+    Raises ValueError for malformed values.
+    """
+    filters = {}
+    for key in ('year_from', 'year_to', 'seasontype', 'week'):
+        value = args.get(key)
+        if value not in (None, ''):
+            filters[key] = int(value)
+    if args.get('year'):
+        filters['year_from'] = filters['year_to'] = int(args['year'])
+
+    team = args.get('team')
+    if team:
+        filters['team'] = team.upper()
+
+    correct = args.get('correct')
+    if correct:
+        if correct.lower() not in ('true', 'false'):
+            raise ValueError("'correct' must be 'true' or 'false'")
+        filters['correct'] = correct.lower() == 'true'
+    return filters
+
+def matches(record, filters):
+    """Checks a single history record against the parsed filters."""
+    if 'year_from' in filters and record.year < filters['year_from']: return False
+    if 'year_to' in filters and record.year > filters['year_to']: return False
+    if 'seasontype' in filters and record.seasontype != filters['seasontype']: return False
+    if 'week' in filters and record.week != filters['week']: return False
+    if 'team' in filters and filters['team'] not in (record.home_team, record.away_team): return False
+    # Games without a result (is_correct is None) are neither correct nor incorrect.
+    if 'correct' in filters and record.is_correct is not filters['correct']: return False
+    return True
+
+def find_page_end(history, filters, cursor, limit):
+    """
+    Scans (without collecting rows) for the end of the page starting at 'cursor'.
+    Returns (end_index, next_cursor); next_cursor is None on the last page.
+    """
+    count = 0
+    for index in range(cursor, len(history)):
+        if matches(history[index], filters):
+            if count == limit:
+                return index, index
+            count += 1
+    return len(history), None
+
+def iter_page(history, filters, cursor, end):
+    """Yields the matching rows in history[cursor:end] without copying the slice."""
+    for index in range(cursor, end):
+        record = history[index]
+        if matches(record, filters):
+            yield record
+
+def stream_csv(records, fieldnames):
+    """Encodes records as CSV one line at a time, reusing a single buffer."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.getvalue()
+    for record in records:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(record.to_dict())
+        yield buffer.getvalue()
+
+def stream_ndjson(records, fieldnames):
+    """Encodes records as newline-delimited JSON with native types."""
+    for record in records:
+        yield json.dumps({key: getattr(record, key) for key in fieldnames}) + '\n'
+
+def compute_standings(games, overrides=None, extra_games=()):
+    """
+    Actual and predicted records per team from finished games, in one pass.
+    overrides maps game_id -> winner to replace actual results; extra_games are
+    records for games not in the history (e.g. hypothetical results).
+    Returns {team: counts and record strings}.
+    """
+    overrides = overrides or {}
+    standings = {}
+
+    def entry(team):
+        row = standings.get(team)
+        if row is None:
+            row = standings[team] = {'actual_wins': 0, 'actual_losses': 0, 'actual_ties': 0, 'predicted_wins': 0, 'predicted_losses': 0}
+        return row
+
+    for games_list in (games, extra_games):
+        for game in games_list:
+            actual_winner = overrides.get(game.game_id, game.actual_winner)
+            if not actual_winner:
+                continue
+            for team, opponent in ((game.home_team, game.away_team), (game.away_team, game.home_team)):
+                row = entry(team)
+                if actual_winner == team: row['actual_wins'] += 1
+                elif actual_winner == opponent: row['actual_losses'] += 1
+                else: row['actual_ties'] += 1
+                if game.predicted_winner == team: row['predicted_wins'] += 1
+                elif game.predicted_winner == opponent: row['predicted_losses'] += 1
+
+    for row in standings.values():
+        row['difference'] = row['actual_wins'] - row['predicted_wins']
+        row['actual_record'] = f"{row['actual_wins']}-{row['actual_losses']}" + (f"-{row['actual_ties']}" if row['actual_ties'] > 0 else "")
+        row['predicted_record'] = f"{row['predicted_wins']}-{row['predicted_losses']}"
+    return standings
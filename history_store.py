@@ -0,0 +1,153 @@
+# history_store.py
+import csv
+import sys
+
+FIELDNAMES = [
+    'year', 'seasontype', 'week', 'game_id', 'home_team', 'away_team',
+    'predicted_winner', 'actual_winner', 'home_win_prob', 'away_win_prob', 'is_correct'
+]
+
+def _team(value):
+    # Team codes repeat on every row, so intern them to share one string per team.
+    return sys.intern(str(value)) if value not in (None, '') else None
+
+# Years repeat on every row and are above CPython's small-int cache, so share one object per year.
+_years = {}
+
+def _year(value):
+    year = int(value)
+    return _years.setdefault(year, year)
+
+def _game_key(value):
+    """
+    ESPN game IDs are 9-digit strings; stored as ints they take about half the
+    memory. Anything that would not round-trip through int() stays a string.
+    """
+    value = str(value)
+    if value.isdigit() and value[0] != '0':
+        return int(value)
+    return value
+
+def _float(value):
+    return float(value) if value not in (None, '') else None
+
+def _bool(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, bool):
+        return value
+    return str(value) == 'True'
+
+class HistoryRecord:
+    """
+    One prediction history row with typed fields. Slotted to keep the per-row
+    footprint small; team codes and years are shared and the game ID is kept
+    as an int (game_id still reads as the string ESPN uses).
+    """
+    __slots__ = [field if field != 'game_id' else 'game_key' for field in FIELDNAMES]
+
+    def __init__(self, year, seasontype, week, game_id, home_team, away_team,
+                 predicted_winner, actual_winner, home_win_prob, away_win_prob, is_correct):
+        self.year = _year(year)
+        self.seasontype = int(seasontype)
+        self.week = int(week)
+        self.game_key = _game_key(game_id)
+        self.home_team = _team(home_team)
+        self.away_team = _team(away_team)
+        self.predicted_winner = _team(predicted_winner)
+        self.actual_winner = _team(actual_winner)
+        self.home_win_prob = _float(home_win_prob)
+        self.away_win_prob = _float(away_win_prob)
+        self.is_correct = _bool(is_correct)
+
+    @property
+    def game_id(self):
+        return str(self.game_key)
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a record from a CSV row or an in-memory game dict."""
+        return cls(*(row.get(field) for field in FIELDNAMES))
+
+    def to_dict(self, typed=False):
+        """
+        Converts back to the dict shape used by prediction_history.csv (all strings,
+        '' for missing values). With typed=True the native values are kept instead.
+        """
+        if typed:
+            return {field: getattr(self, field) for field in FIELDNAMES}
+        return {field: '' if getattr(self, field) is None else str(getattr(self, field)) for field in FIELDNAMES}
+
+class HistoryStore:
+    """
+    The in-memory prediction history: an append-only list of records plus
+    indexes by game ID, by (year, seasontype) and by (year, seasontype, week).
+
+    The season and week indexes hold [start, stop) ranges into the record list
+    rather than per-row lists. The history is written week by week, so a key
+    normally has a single range; rows appended out of order (e.g. live games
+    recorded by the app) start another range for their key.
+    """
+    def __init__(self, records=()):
+        self.records = []
+        self.by_id = {}
+        self.by_season = {}
+        self.by_week = {}
+        for record in records:
+            self.append(record)
+
+    @staticmethod
+    def _extend_range(index, key, position):
+        ranges = index.get(key)
+        if ranges is None:
+            index[key] = [position, position + 1]
+        elif ranges[-1] == position:
+            ranges[-1] = position + 1
+        else:
+            ranges += (position, position + 1)
+
+    def _rows(self, ranges):
+        if not ranges:
+            return []
+        if len(ranges) == 2:
+            return self.records[ranges[0]:ranges[1]]
+        return [record for start, stop in zip(ranges[::2], ranges[1::2]) for record in self.records[start:stop]]
+
+    def append(self, record):
+        position = len(self.records)
+        self.records.append(record)
+        self.by_id[record.game_key] = record
+        self._extend_range(self.by_season, (record.year, record.seasontype), position)
+        self._extend_range(self.by_week, (record.year, record.seasontype, record.week), position)
+
+    def get(self, game_id):
+        return self.by_id.get(_game_key(game_id))
+
+    def season(self, year, seasontype):
+        return self._rows(self.by_season.get((year, seasontype)))
+
+    def week(self, year, seasontype, week):
+        return self._rows(self.by_week.get((year, seasontype, week)))
+
+    def __contains__(self, game_id):
+        return _game_key(game_id) in self.by_id
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+def load_history(filepath):
+    """Reads prediction_history.csv into a HistoryStore, skipping malformed rows."""
+    store = HistoryStore()
+    with open(filepath, mode='r', newline='') as infile:
+        for row in csv.DictReader(infile):
+            try:
+                store.append(HistoryRecord.from_row(row))
+            except (TypeError, ValueError):
+                continue
+    return store
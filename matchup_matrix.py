@@ -0,0 +1,194 @@
+# matchup_matrix.py
+import argparse
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+from data_loader import team_to_row, load_teams_from_csv, load_current_season_stats, prediction_settings
+from predict import win_probability
+import ratings as ratings_module
+
+MATRIX_DIR = 'matchups'
+MAGIC = b'NFLM'
+FORMAT_VERSION = 1
+# magic, format version, team count, prediction week, padding, stats version
+HEADER = struct.Struct('<4sHHH2x16s')
+CODE_BYTES = 4
+
+def stats_version(teamsold_dict, teamsnew_dict, form=None, ratings=None):
+    """
+    Short hash of everything a prediction depends on, so a matrix file is rebuilt
+    whenever the stats, form mode or ratings change. It hashes every team row, so
+    MatrixCache only computes it when the caller's generation number changes.
+    """
+    digest = hashlib.sha1()
+    for teams in (teamsold_dict, teamsnew_dict):
+        for abv in sorted(teams):
+            # The row includes the form averages and the last-N window.
+            digest.update(json.dumps(team_to_row(abv, teams[abv]), sort_keys=True).encode())
+    # The solved ratings rather than the game count: games added but not yet solved
+    # don't change predictions.
+    solved = None
+    if ratings:
+        solved = [sorted(side[stat].items()) for side in (ratings.offense, ratings.defense) for stat in sorted(side)]
+    digest.update(json.dumps([form, solved]).encode())
+    return digest.hexdigest()[:16]
+
+def matrix_path(week, version, directory=MATRIX_DIR):
+    return os.path.join(directory, f'week{week:02d}_{version}.bin')
+
+def build_matrix(path, week, teamsold_dict, teamsnew_dict, form=None, ratings=None, version=''):
+    """
+    Writes the home/away matrix for a prediction week: cell [home][away] is the
+    probability that the home team wins, as float32, with NaN on the diagonal.
+    """
+    teams = sorted(abv for abv in teamsold_dict if abv in teamsnew_dict)
+    values = array('f')
+    for home in teams:
+        for away in teams:
+            prob = None
+            if home != away:
+                prob = win_probability(home, away, teamsold_dict, teamsnew_dict, week, home, form, ratings)
+            values.append(float('nan') if prob is None else prob)
+    if sys.byteorder != 'little':
+        values.byteswap()
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(teams), week, version.encode('ascii')))
+        f.write(b''.join(abv.encode('ascii').ljust(CODE_BYTES, b'\0') for abv in teams))
+        values.tofile(f)
+    os.replace(tmp_path, path)
+
+class MatchupMatrix:
+    """
+    A memory-mapped matrix file. Lookups index straight into the mapped floats, so a
+    hypothetical matchup costs an array read rather than a model evaluation.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, count, self.week, version = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self.buffer.close()
+            raise ValueError(f"'{path}' is not a matchup matrix file.")
+        self.version = version.decode('ascii')
+        codes_end = HEADER.size + count * CODE_BYTES
+        codes = self.buffer[HEADER.size:codes_end]
+        self.teams = [codes[i:i + CODE_BYTES].rstrip(b'\0').decode('ascii') for i in range(0, len(codes), CODE_BYTES)]
+        self.index = {abv: i for i, abv in enumerate(self.teams)}
+        if sys.byteorder == 'little':
+            self.values = memoryview(self.buffer)[codes_end:codes_end + count * count * 4].cast('f')
+        else:
+            self.values = array('f', self.buffer[codes_end:codes_end + count * count * 4])
+            self.values.byteswap()
+
+    def probability(self, home, away):
+        """Probability that 'home' beats 'away' at home, or None."""
+        i, j = self.index.get(home), self.index.get(away)
+        if i is None or j is None or i == j:
+            return None
+        value = self.values[i * len(self.teams) + j]
+        return None if value != value else value
+
+    def team(self, abv):
+        """A team's win probability against every opponent, at home and away."""
+        if abv not in self.index:
+            return None
+        opponents = [other for other in self.teams if other != abv]
+        home = {other: self.probability(abv, other) for other in opponents}
+        away = {}
+        for other in opponents:
+            prob = self.probability(other, abv)
+            away[other] = None if prob is None else 1 - prob
+        return {"home": home, "away": away}
+
+    def rows(self):
+        """The whole matrix as nested lists (rows are home teams), None on the diagonal."""
+        n = len(self.teams)
+        return [[None if v != v else v for v in self.values[i * n:(i + 1) * n].tolist()] for i in range(n)]
+
+    def close(self):
+        if isinstance(self.values, memoryview):
+            self.values.release()
+        self.buffer.close()
+
+class MatrixCache:
+    """
+    Keeps the current matrix of each prediction week mapped, building the file on
+    first use for a new stats version and removing that week's older versions.
+    Entries are keyed on a generation number the caller bumps whenever the stats or
+    ratings change, so a warm lookup is a dict read.
+    """
+    def __init__(self, directory=MATRIX_DIR):
+        self.directory = directory
+        self.matrices = {}   # week -> (generation, MatchupMatrix)
+        self.lock = threading.Lock()
+
+    def current(self, week, generation):
+        """The mapped matrix for a week if it was loaded for this generation, else None."""
+        entry = self.matrices.get(week)
+        return entry[1] if entry and entry[0] == generation else None
+
+    def get(self, week, generation, teamsold_dict, teamsnew_dict, form=None, ratings=None):
+        """
+        The matrix for a week at this generation, loading or building it on a miss.
+        The stats must not change during a miss (callers hold their stats lock).
+        """
+        matrix = self.current(week, generation)
+        if matrix:
+            return matrix
+        with self.lock:
+            matrix = self.current(week, generation)
+            if matrix:
+                return matrix
+            version = stats_version(teamsold_dict, teamsnew_dict, form, ratings)
+            entry = self.matrices.get(week)
+            if entry and entry[1].version == version:
+                self.matrices[week] = (generation, entry[1])
+                return entry[1]
+            path = matrix_path(week, version, self.directory)
+            if not os.path.exists(path):
+                print(f"Building matchup matrix for week {week} (stats version {version})...")
+                build_matrix(path, week, teamsold_dict, teamsnew_dict, form, ratings, version)
+                for old_path in glob.glob(os.path.join(self.directory, f'week{week:02d}_*.bin')):
+                    if old_path != path:
+                        os.remove(old_path)
+            # Older mappings are left for the garbage collector, since a request
+            # may still be reading from one.
+            matrix = MatchupMatrix(path)
+            self.matrices[week] = (generation, matrix)
+            return matrix
+
+def main():
+    # Defaults match the app (PREDICTION_FORM / PREDICTION_RATINGS), so the files
+    # built here have the stats version the app looks for.
+    form, use_ratings = prediction_settings()
+    parser = argparse.ArgumentParser(description="Precompute home/away win-probability matrices.")
+    parser.add_argument('--weeks', default='1-22', help="Prediction weeks, e.g. '12' or '1-18' (19-22 are the playoffs).")
+    parser.add_argument('--form', choices=['ewma', 'last_n'], default=form,
+                        help="Use recency-weighted current-season stats (default: PREDICTION_FORM).")
+    parser.add_argument('--ratings', action='store_true', default=use_ratings,
+                        help="Use opponent-adjusted ratings once teams have enough games (default: PREDICTION_RATINGS).")
+    args = parser.parse_args()
+
+    first, _, last = args.weeks.partition('-')
+    weeks = range(int(first), int(last or first) + 1)
+    teamsold_dict = load_teams_from_csv('final_team_stats.csv')
+    teamsnew_dict = load_current_season_stats()
+    ratings = ratings_module.load_ratings() if args.ratings else None
+
+    cache = MatrixCache()
+    for week in weeks:
+        matrix = cache.get(week, 0, teamsold_dict, teamsnew_dict, args.form, ratings)
+        print(f"Week {week}: {len(matrix.teams)} teams, version {matrix.version}")
+
+if __name__ == "__main__":
+    main()
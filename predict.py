@@ -1,7 +1,7 @@
 import random
-from team import pyth_win, expect_stat, get_weighted_stat
+from team import pyth_win, expect_stat, get_weighted_stat, FormView
 
-def calculate_expected_stats(team1_data_old, team1_data_new, team2_data_old, team2_data_new, week, home_team_abv, team1_abv):
+def calculate_expected_stats(team1_data_old, team1_data_new, team2_data_old, team2_data_new, week, home_team_abv, team1_abv, form=None, ratings=None, team2_abv=None):
     expected_stats = {"team1": {}, "team2": {}}
     
     # --- Define Thresholds and Constants ---
@@ -11,6 +11,10 @@ def calculate_expected_stats(team1_data_old, team1_data_new, team2_data_old, tea
     BAD_RUSH_DEF_THRESHOLD = 125
     HOME_FIELD_ADVANTAGE_POINTS = 2.5 # Average point advantage for home teams
 
+    # --- Use Recency-Weighted Current-Season Stats When Asked ---
+    if form:
+        team1_data_new, team2_data_new = FormView(team1_data_new, form), FormView(team2_data_new, form)
+
     # --- Get Weighted Averages using Dynamic Weighting ---
     t1_pyds_for = get_weighted_stat(team1_data_old.avg_pyds_for, team1_data_new.avg_pyds_for, week)
     t1_pyds_agst = get_weighted_stat(team1_data_old.avg_pyds_agst, team1_data_new.avg_pyds_agst, week)
@@ -44,6 +48,12 @@ def calculate_expected_stats(team1_data_old, team1_data_new, team2_data_old, tea
     expected_stats["team1"]["points"] = expect_stat(get_weighted_stat(team1_data_old.avg_points_for, team1_data_new.avg_points_for, week), get_weighted_stat(team2_data_old.avg_points_agst, team2_data_new.avg_points_agst, week))
     expected_stats["team2"]["points"] = expect_stat(get_weighted_stat(team2_data_old.avg_points_for, team2_data_new.avg_points_for, week), get_weighted_stat(team1_data_old.avg_points_agst, team1_data_new.avg_points_agst, week))
 
+    # --- Use Opponent-Adjusted Ratings Once Both Teams Have Enough Games ---
+    if ratings and team2_abv and ratings.has_ratings(team1_abv) and ratings.has_ratings(team2_abv):
+        for category in ["pyds", "ryds", "takeaways", "points"]:
+            expected_stats["team1"][category] = ratings.expected(team1_abv, team2_abv, category)
+            expected_stats["team2"][category] = ratings.expected(team2_abv, team1_abv, category)
+
     # --- Apply Home-Field Advantage ---
     if team1_abv == home_team_abv:
         expected_stats["team1"]["points"] += HOME_FIELD_ADVANTAGE_POINTS
@@ -59,17 +69,25 @@ def calculate_pythagorean_wins(expected_stats_team1, expected_stats_team2):
         total_pyth_win += pyth_win(expected_stats_team1[category], expected_stats_team2[category])
     return total_pyth_win / len(categories)
 
-def predict_winner(team1_abv, team2_abv, teamsold_dict, teamsnew_dict, week, home_team_abv):
+def win_probability(team1_abv, team2_abv, teamsold_dict, teamsnew_dict, week, home_team_abv, form=None, ratings=None):
+    """
+    The model's probability that team1 beats team2, or None if either team has no
+    stats. Same model as predict_winner, without the logging or the tie-break.
+    """
     if team1_abv not in teamsold_dict or team2_abv not in teamsold_dict:
-        return None, 0, 0
-        
+        return None
+
     expected_stats = calculate_expected_stats(
         teamsold_dict[team1_abv], teamsnew_dict[team1_abv],
         teamsold_dict[team2_abv], teamsnew_dict[team2_abv],
-        week, home_team_abv, team1_abv
+        week, home_team_abv, team1_abv, form, ratings, team2_abv
     )
-    
-    team1_score = calculate_pythagorean_wins(expected_stats["team1"], expected_stats["team2"])
+    return calculate_pythagorean_wins(expected_stats["team1"], expected_stats["team2"])
+
+def predict_winner(team1_abv, team2_abv, teamsold_dict, teamsnew_dict, week, home_team_abv, form=None, ratings=None):
+    team1_score = win_probability(team1_abv, team2_abv, teamsold_dict, teamsnew_dict, week, home_team_abv, form, ratings)
+    if team1_score is None:
+        return None, 0, 0
     team2_score = 1 - team1_score
 
     print(f"{team1_abv} (Home: {team1_abv == home_team_abv}): {team1_score * 100:.2f}% | {team2_abv}: {team2_score * 100:.2f}%")
@@ -0,0 +1,184 @@
+# profiler.py
+import cProfile
+import glob
+import os
+import pstats
+import random
+import threading
+import time
+
+from flask import g, request
+
+# --- Configuration (all opt-in through environment variables) ---
+# PROFILE_SAMPLE_RATE: fraction of requests to profile, e.g. 0.05 for 5%.
+# PROFILE_SLOW_MS: keep a profile for any request slower than this many milliseconds.
+# PROFILE_ADMIN_TOKEN: enables '?profile=<token>' to force profiling a single request.
+# PROFILE_DIR / PROFILE_MAX_FILES: where profiles are written and how many are kept.
+SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0) or 0)
+SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', 0) or 0)
+ADMIN_TOKEN = os.environ.get('PROFILE_ADMIN_TOKEN', '')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+MAX_FILES = max(int(os.environ.get('PROFILE_MAX_FILES', 50) or 50), 1)
+
+# cProfile can only have one active profiler per process, so concurrent requests
+# that would overlap are simply left unprofiled. On Python 3.12+ a profile covers
+# every thread, so work a request hands to a worker thread is included.
+_active_lock = threading.Lock()
+_ring_lock = threading.Lock()
+_next_slot = None
+
+def is_enabled():
+    """Returns True if any profiling trigger is configured."""
+    return SAMPLE_RATE > 0 or SLOW_MS > 0 or bool(ADMIN_TOKEN)
+
+def is_admin_request(req=None):
+    """Checks the admin token passed as the 'profile' query parameter."""
+    req = req or request
+    return bool(ADMIN_TOKEN) and req.args.get('profile') == ADMIN_TOKEN
+
+# The hooks take the framework's request and g, so Flask and Quart (asgi.py) share them.
+def _start_profile(req, ctx):
+    if is_admin_request(req) or (SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE):
+        keep_always = True
+    elif SLOW_MS > 0:
+        keep_always = False
+    else:
+        return
+
+    if not _active_lock.acquire(blocking=False):
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiling tool (e.g. a debugger) is already attached.
+        _active_lock.release()
+        return
+    ctx._profile = profile
+    ctx._profile_keep = keep_always
+    ctx._profile_start = time.perf_counter()
+
+def _finish_profile(response, req, ctx):
+    profile = ctx.pop('_profile', None)
+    if profile is None:
+        return response
+    profile.disable()
+    _active_lock.release()
+
+    elapsed_ms = (time.perf_counter() - ctx._profile_start) * 1000
+    if ctx._profile_keep or elapsed_ms >= SLOW_MS:
+        _write_profile(profile, elapsed_ms, req)
+    return response
+
+def _abandon_profile(ctx):
+    # Flask runs after_request even when a view raises (the error response is still
+    # finalized), but not if an earlier after_request hook or the finalization itself
+    # fails. Release the profiler here in that case so the next request can profile.
+    profile = ctx.pop('_profile', None)
+    if profile is not None:
+        profile.disable()
+        _active_lock.release()
+
+def _write_profile(profile, elapsed_ms, req):
+    """Writes a profile into the next slot of the on-disk ring."""
+    global _next_slot
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with _ring_lock:
+            if _next_slot is None:
+                _next_slot = _oldest_slot()
+            slot = _next_slot
+            _next_slot = (_next_slot + 1) % MAX_FILES
+            # Remove whatever was stored in this slot before writing the new profile.
+            for old_path in glob.glob(os.path.join(PROFILE_DIR, f'slot{slot:03d}_*.prof')):
+                os.remove(old_path)
+        endpoint = (req.endpoint or 'unknown').replace('/', '_')
+        path = os.path.join(PROFILE_DIR, f'slot{slot:03d}_{endpoint}_{int(elapsed_ms)}ms.prof')
+        profile.dump_stats(path)
+        print(f"Profiled {req.path} ({elapsed_ms:.0f} ms) -> {path}")
+    except OSError as e:
+        print(f"Could not write profile: {e}")
+
+def _oldest_slot():
+    """Resumes the ring after a restart by picking a free or the least recently written slot."""
+    written = {}
+    for path in glob.glob(os.path.join(PROFILE_DIR, 'slot*_*.prof')):
+        try:
+            slot = int(os.path.basename(path)[4:7])
+        except ValueError:
+            continue
+        written[slot] = os.path.getmtime(path)
+    for slot in range(MAX_FILES):
+        if slot not in written:
+            return slot
+    return min(written, key=written.get)
+
+def list_profiles():
+    """Returns the profile files currently in the ring, newest first."""
+    written = {}
+    for path in glob.glob(os.path.join(PROFILE_DIR, 'slot*_*.prof')):
+        try:
+            written[path] = os.path.getmtime(path)
+        except OSError:
+            continue  # Removed by the ring since the glob
+    return sorted(written, key=written.get, reverse=True)
+
+def summarize_profiles(limit=25):
+    """
+    Merges every captured profile and returns the top functions by cumulative time.
+    """
+    paths = list_profiles()
+    if not paths:
+        return {"profiles": 0, "functions": []}
+
+    # Profiles can be truncated mid-write or removed by the ring while we read them.
+    stats = pstats.Stats()
+    readable = 0
+    for path in paths:
+        try:
+            stats.add(path)
+            readable += 1
+        except (OSError, EOFError, TypeError, ValueError) as e:
+            print(f"Skipping unreadable profile {path}: {e}")
+
+    functions = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        functions.append({
+            "function": f"{os.path.basename(filename)}:{line}({func})",
+            "calls": nc,
+            "total_time": tt,
+            "cumulative_time": ct
+        })
+    functions.sort(key=lambda f: f['cumulative_time'], reverse=True)
+    return {"profiles": readable, "functions": functions[:limit]}
+
+def init_app(app):
+    """Registers the request hooks on a Flask app when profiling is configured."""
+    if not is_enabled():
+        return
+    app.before_request(lambda: _start_profile(request, g))
+    app.after_request(lambda response: _finish_profile(response, request, g))
+    app.teardown_request(lambda exc: _abandon_profile(g))
+    print(f"Request profiling enabled (sample rate {SAMPLE_RATE}, slow threshold {SLOW_MS} ms).")
+
+def init_quart_app(app):
+    """
+    Registers the same hooks on the Quart app in asgi.py. Requests interleave on the
+    event loop, so a profile also contains whatever else ran while it was active.
+    """
+    if not is_enabled():
+        return
+    from quart import g as quart_g, request as quart_request
+
+    async def start_profile():
+        _start_profile(quart_request, quart_g)
+
+    async def finish_profile(response):
+        return _finish_profile(response, quart_request, quart_g)
+
+    async def abandon_profile(exc):
+        _abandon_profile(quart_g)
+
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    app.teardown_request(abandon_profile)
@@ -0,0 +1,145 @@
+# ratings.py
+import json
+import os
+from collections import defaultdict
+
+# Expected-stat categories used by predict.calculate_expected_stats, mapped to the
+# add_game value a team produces against its opponent in that category.
+RATED_STATS = {'pyds': 'pyds_for', 'ryds': 'ryds_for', 'takeaways': 'takeaways', 'points': 'points_for'}
+RIDGE = 2.0       # Shrinks teams with few games towards the league average
+MIN_GAMES = 3     # Games a team needs before its ratings are used for predictions
+TOLERANCE = 1e-4  # Largest rating change (in stat units) at which a solve is converged
+MAX_SWEEPS = 200
+SEASON_GAMES_FILE = 'current_season_games.json'
+
+class RatingsEngine:
+    """
+    Opponent-adjusted (SRS-style) ratings. Every game contributes, per stat, one
+    observation for each side:  value = league_mean + offense[team] + defense[opponent],
+    where a positive defense rating means the team allows more than average.
+
+    The ridge-regularised least-squares system is solved with Gauss-Seidel sweeps over
+    per-team adjacency lists (each sweep is O(games)), starting from the previous
+    solution, so a weekly re-solve after adding a handful of games takes a few sweeps.
+    """
+    def __init__(self, ridge=RIDGE):
+        self.ridge = ridge
+        self.games = []
+        self.game_index = {}                       # game_id -> position in games
+        self.opponents_faced = defaultdict(list)   # team -> defenses it played against
+        self.offenses_faced = defaultdict(list)    # team -> offenses it defended against
+        self.sum_for = {stat: defaultdict(float) for stat in RATED_STATS}
+        self.sum_allowed = {stat: defaultdict(float) for stat in RATED_STATS}
+        self.total = dict.fromkeys(RATED_STATS, 0.0)
+        self.observations = 0
+        self.offense = {stat: defaultdict(float) for stat in RATED_STATS}
+        self.defense = {stat: defaultdict(float) for stat in RATED_STATS}
+
+    def add_game(self, game, game_id=None):
+        """
+        Adds a game as returned by team.parse_game_json: [(team1_abv, team1_values),
+        (team2_abv, team2_values)] with add_game keyword values for each side.
+        """
+        (team1, values1), (team2, values2) = game[:2]
+        if game_id is not None:
+            self.game_index[str(game_id)] = len(self.games)
+            self.games.append([[team1, values1], [team2, values2], str(game_id)])
+        else:
+            self.games.append([[team1, values1], [team2, values2]])
+        for offense, defense, values in ((team1, team2, values1), (team2, team1, values2)):
+            self.opponents_faced[offense].append(defense)
+            self.offenses_faced[defense].append(offense)
+            for stat, field in RATED_STATS.items():
+                value = float(values.get(field, 0))
+                self.sum_for[stat][offense] += value
+                self.sum_allowed[stat][defense] += value
+                self.total[stat] += value
+            self.observations += 1
+
+    def mean(self, stat):
+        return self.total[stat] / self.observations if self.observations else 0.0
+
+    def solve(self, tolerance=TOLERANCE, max_sweeps=MAX_SWEEPS):
+        """
+        Re-solves all stats, warm-started from the current ratings.
+        Returns the number of sweeps the slowest stat needed.
+        """
+        most_sweeps = 0
+        for stat in RATED_STATS:
+            mu = self.mean(stat)
+            offense, defense = self.offense[stat], self.defense[stat]
+            sum_for, sum_allowed = self.sum_for[stat], self.sum_allowed[stat]
+            for sweep in range(1, max_sweeps + 1):
+                largest_change = 0.0
+                for team, opponents in self.opponents_faced.items():
+                    n = len(opponents)
+                    value = (sum_for[team] - n * mu - sum(defense[o] for o in opponents)) / (n + self.ridge)
+                    largest_change = max(largest_change, abs(value - offense[team]))
+                    offense[team] = value
+                for team, opponents in self.offenses_faced.items():
+                    n = len(opponents)
+                    value = (sum_allowed[team] - n * mu - sum(offense[o] for o in opponents)) / (n + self.ridge)
+                    largest_change = max(largest_change, abs(value - defense[team]))
+                    defense[team] = value
+                if largest_change < tolerance:
+                    break
+            most_sweeps = max(most_sweeps, sweep)
+        return most_sweeps
+
+    def game_values(self, game_id):
+        """The logged [(team1_abv, values), (team2_abv, values)] of a game, or None."""
+        index = self.game_index.get(str(game_id))
+        return self.games[index][:2] if index is not None else None
+
+    def games_around(self, game_id, team):
+        """(games 'team' played before, games it played after) a logged game, or None."""
+        index = self.game_index.get(str(game_id))
+        if index is None:
+            return None
+        before = after = 0
+        for position, game in enumerate(self.games):
+            if position != index and team in (game[0][0], game[1][0]):
+                if position < index:
+                    before += 1
+                else:
+                    after += 1
+        return before, after
+
+    def games_played(self, team):
+        return len(self.opponents_faced.get(team, ()))
+
+    def has_ratings(self, team):
+        return self.games_played(team) >= MIN_GAMES
+
+    def expected(self, offense_team, defense_team, stat):
+        """Expected value of a stat for offense_team against defense_team."""
+        value = self.mean(stat) + self.offense[stat].get(offense_team, 0.0) + self.defense[stat].get(defense_team, 0.0)
+        return max(value, 0.0)
+
+    def to_dict(self):
+        return {'ridge': self.ridge, 'games': self.games}
+
+    @classmethod
+    def from_dict(cls, data):
+        engine = cls(ridge=data.get('ridge', RIDGE))
+        for game in data.get('games', []):
+            engine.add_game(game, game[2] if len(game) > 2 else None)
+        engine.solve()
+        return engine
+
+def load_ratings(path=SEASON_GAMES_FILE):
+    """Rebuilds the ratings from a saved game log, or returns an empty engine."""
+    try:
+        with open(path, 'r') as f:
+            return RatingsEngine.from_dict(json.load(f))
+    except FileNotFoundError:
+        return RatingsEngine()
+    except (json.JSONDecodeError, ValueError, TypeError) as e:
+        print(f"WARNING: Could not load ratings game log '{path}': {e}")
+        return RatingsEngine()
+
+def save_ratings(engine, path=SEASON_GAMES_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(engine.to_dict(), f)
+    os.replace(tmp_path, path)
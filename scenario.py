@@ -0,0 +1,225 @@
+# scenario.py
+from collections.abc import Mapping
+
+from team import FORM_INDEX, FORM_STATS
+from predict import win_probability
+from history_query import compute_standings
+
+# Points added to the chosen winner when a tied game is overridden.
+TIE_BREAK_POINTS = 3.0
+
+class TeamOverlay:
+    """
+    Read-only view of a Team with extra games and per-stat deltas applied on top of
+    its cumulative totals, without copying it. Form is tracked apart from the totals
+    the way Team.add_game would change it: an added game takes an EWMA step and
+    enters the last-N window, and a flipped game's point changes count with the
+    weight that game still has in each average.
+    """
+    __slots__ = ('base', 'deltas', 'games', 'form_deltas', 'added', 'flipped')
+
+    def __init__(self, base):
+        self.base = base
+        self.deltas = {}
+        self.games = base.games
+        self.form_deltas = {}
+        self.added = []      # values of added games, oldest first
+        self.flipped = []    # (base games played after it, changed values) per flipped game
+
+    def _add_totals(self, values):
+        for stat, value in values.items():
+            self.deltas[stat] = self.deltas.get(stat, 0.0) + value
+
+    def add_game(self, values):
+        """Counts a new game with the given value of every stat in FORM_STATS."""
+        self._add_totals(values)
+        self.games += 1
+        alpha = 1.0 if self.games == 1 else self.base.form_alpha
+        for stat, value in values.items():
+            self.form_deltas[stat] = self.form_deltas.get(stat, 0.0) + alpha * (value - self.form_avg(stat))
+        self.added.append(values)
+
+    def change_game(self, changes, position):
+        """
+        Changes the values of a game already in the base stats. position is the
+        (games before, games after) it in the team's season, from the game log.
+        """
+        self._add_totals(changes)
+        before, after = position
+        alpha = self.base.form_alpha
+        # Weight of that game in the EWMA: alpha (1 for a first game), decayed by every
+        # game since, added ones included.
+        weight = (1.0 if before == 0 else alpha) * (1 - alpha) ** (after + len(self.added))
+        for stat, value in changes.items():
+            self.form_deltas[stat] = self.form_deltas.get(stat, 0.0) + weight * value
+        self.flipped.append((after, changes))
+
+    def total(self, stat):
+        return getattr(self.base, stat) + self.deltas.get(stat, 0.0)
+
+    def __getattr__(self, name):
+        # Only reached for names not in __slots__: the totals and avg_* properties.
+        if name.startswith('avg_') and name[4:] in FORM_STATS:
+            return self.total(name[4:]) / self.games if self.games > 0 else 0
+        if name in FORM_STATS:
+            return self.total(name)
+        raise AttributeError(name)
+
+    def form_avg(self, stat):
+        return self.base.form_avg(stat) + self.form_deltas.get(stat, 0.0)
+
+    def recent_avg(self, stat):
+        """The base last-N window with the added games pushed in and flipped games changed."""
+        recent = self.base.recent
+        if recent is None or (not recent and not self.added):
+            # Same fallback as Team.recent_avg: the season average.
+            return getattr(self, f'avg_{stat}')
+        index = FORM_INDEX[stat]
+        added = self.added[-recent.maxlen:]
+        kept = max(0, min(len(recent), recent.maxlen - len(added)))
+        total = self.base.recent_sums[index] - sum(recent[i][index] for i in range(len(recent) - kept))
+        total += sum(values[stat] for values in added)
+        total += sum(changes.get(stat, 0.0) for after, changes in self.flipped if after < kept)
+        return total / (kept + len(added))
+
+class OverlayTeams(Mapping):
+    """A teams dict in which only the teams a scenario touched are overlays."""
+    def __init__(self, base):
+        self.base = base
+        self.overlays = {}
+
+    def overlay(self, team):
+        view = self.overlays.get(team)
+        if view is None:
+            view = self.overlays[team] = TeamOverlay(self.base[team])
+        return view
+
+    def __getitem__(self, team):
+        view = self.overlays.get(team)
+        return view if view is not None else self.base[team]
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __len__(self):
+        return len(self.base)
+
+    def __contains__(self, team):
+        return team in self.base
+
+class HypotheticalGame:
+    """A game outside the history (not yet played or not yet ingested) with an assumed result."""
+    __slots__ = ('game_id', 'week', 'home_team', 'away_team', 'actual_winner', 'predicted_winner')
+
+    def __init__(self, game_id, week, home_team, away_team, actual_winner, predicted_winner):
+        self.game_id = game_id
+        self.week = week
+        self.home_team = home_team
+        self.away_team = away_team
+        self.actual_winner = actual_winner
+        self.predicted_winner = predicted_winner
+
+def flip_points(teams, game_values, winner, positions):
+    """
+    Makes 'winner' win a logged game by giving it the higher score: the scores are
+    swapped, or after a tie the winner gets TIE_BREAK_POINTS more. positions is
+    {team: (games before, games after)} the game, for the form averages.
+    """
+    (team1, values1), (team2, values2) = game_values
+    loser = team2 if winner == team1 else team1
+    points = {team1: values1['points_for'], team2: values2['points_for']}
+    if points[winner] > points[loser]:
+        return
+    tie_break = TIE_BREAK_POINTS if points[winner] == points[loser] else 0.0
+    new_points = {winner: points[loser] + tie_break, loser: points[winner]}
+    for team, opponent in ((winner, loser), (loser, winner)):
+        teams.overlay(team).change_game({
+            'points_for': new_points[team] - points[team],
+            'points_agst': new_points[opponent] - points[opponent]
+        }, positions[team])
+
+def add_hypothetical_game(teams, home, away, winner):
+    """
+    Adds a game in which each side produces its current per-game averages, with the
+    two average scores assigned so that 'winner' comes out ahead.
+    """
+    loser = away if winner == home else home
+    averages = {team: {stat: getattr(teams[team], f'avg_{stat}') for stat in FORM_STATS} for team in (home, away)}
+    high, low = sorted((averages[home]['points_for'], averages[away]['points_for']), reverse=True)
+    if high == low:
+        high += TIE_BREAK_POINTS
+    for team, points_for, points_agst in ((winner, high, low), (loser, low, high)):
+        teams.overlay(team).add_game(dict(averages[team], points_for=points_for, points_agst=points_agst))
+
+class Scenario:
+    """
+    A set of overridden results on top of the shared base history and stats. Only the
+    overridden games and the touched teams' deltas are allocated per scenario.
+    """
+    def __init__(self, history, year, seasontype, teamsold_dict, teamsnew_dict, game_log=None):
+        self.history = history
+        self.year = year
+        self.seasontype = seasontype
+        self.teamsold = teamsold_dict
+        self.teams = OverlayTeams(teamsnew_dict)
+        self.game_log = game_log
+        self.winners = {}          # game_id -> overridden winner of a game in the history
+        self.hypothetical = []     # HypotheticalGame for games outside the history
+        self.unadjusted = []       # game_ids whose stats could not be adjusted
+
+    def override(self, game_id, winner, scheduled=None):
+        """
+        Sets the winner of a game. Games in the history have their result flipped;
+        other games need scheduled=(week, home, away) and are added as played.
+        Raises ValueError for unknown games or a winner not in the game.
+        """
+        game_id = str(game_id)
+        record = self.history.get(game_id)
+        if record is not None and record.year == self.year and record.seasontype == self.seasontype:
+            if winner not in (record.home_team, record.away_team):
+                raise ValueError(f"{winner} did not play in game {game_id}")
+            self.winners[game_id] = winner
+            if winner == record.actual_winner:
+                return
+            game_values = self.game_log.game_values(game_id) if self.game_log else None
+            if game_values and all(team in self.teams for team, _ in game_values):
+                positions = {team: self.game_log.games_around(game_id, team) for team, _ in game_values}
+                flip_points(self.teams, game_values, winner, positions)
+            else:
+                self.unadjusted.append(game_id)
+            return
+
+        if scheduled is None:
+            raise ValueError(f"Unknown game {game_id}")
+        week, home, away = scheduled
+        if winner not in (home, away):
+            raise ValueError(f"{winner} did not play in game {game_id}")
+        if home not in self.teams or away not in self.teams:
+            raise ValueError(f"No stats for {home} vs {away}")
+        home_prob = win_probability(home, away, self.teamsold, self.teams.base, week, home)
+        predicted_winner = None if home_prob is None else (home if home_prob >= 0.5 else away)
+        self.hypothetical.append(HypotheticalGame(game_id, week, home, away, winner, predicted_winner))
+        add_hypothetical_game(self.teams, home, away, winner)
+
+    def standings(self):
+        return compute_standings(self.history.season(self.year, self.seasontype), self.winners, self.hypothetical)
+
+    def predict(self, week, games, form=None):
+        """
+        Scenario and baseline home win probabilities for (game_id, home, away) games.
+        Both use the stats model (without opponent-adjusted ratings), so the difference
+        is only the overridden results.
+        """
+        predictions = []
+        for game_id, home, away in games:
+            baseline = win_probability(home, away, self.teamsold, self.teams.base, week, home, form)
+            scenario = win_probability(home, away, self.teamsold, self.teams, week, home, form)
+            if baseline is None or scenario is None:
+                continue
+            predictions.append({
+                "id": game_id, "home_team": home, "away_team": away,
+                "home_win_probability": scenario, "away_win_probability": 1 - scenario,
+                "baseline_home_win_probability": baseline,
+                "predicted_winner": home if scenario >= 0.5 else away
+            })
+        return predictions
@@ -0,0 +1,173 @@
+# schedule_index.py
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import espn_api
+from history_generator import current_season_year
+
+FIRST_SEASON = 2002    # First season of the 32-team, 8-division league
+SEASON_WEEKS = 18      # Regular-season weeks indexed per season
+FETCH_WORKERS = 6      # Weeks fetched concurrently when (re)building a season
+REFRESH_SECONDS = 600  # Age after which a season is refreshed in the background
+
+def parse_kickoff(date_string):
+    """Parses an ESPN event date (e.g. '2024-09-06T00:20Z') into a UTC timestamp."""
+    if not date_string:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(date_string.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+def year_error(year):
+    """
+    The error for a season outside FIRST_SEASON to next season, or None. Every
+    season built is kept in memory, so arbitrary years are rejected before fetching.
+    """
+    last = current_season_year() + 1
+    if not FIRST_SEASON <= year <= last:
+        return f"year must be between {FIRST_SEASON} and {last}"
+    return None
+
+class ScheduleIndex:
+    """
+    In-memory regular-season schedule, one entry per week holding the games (with
+    logos) and the first kickoff. A season is fetched once, all weeks concurrently,
+    and afterwards served from memory; once it is older than REFRESH_SECONDS a
+    single background thread re-fetches it while the old copy keeps being served.
+    Concurrent requests for a season that is not built yet wait for a single build.
+    """
+    def __init__(self, logos, placeholder_logo, fetch_week=espn_api.get_weekly_schedule):
+        self.logos = logos
+        self.placeholder_logo = placeholder_logo
+        self.fetch_week = fetch_week
+        self.seasons = {}        # year -> {'built_at': ts, 'weeks': {week: entry}, 'by_id': {game_id: (week, game)}}
+        self.refreshing = set()  # years with a background refresh in flight
+        self.building = {}       # year -> threading.Event set when its first build finishes
+        self.lock = threading.Lock()
+
+    def build_week(self, year, week):
+        """Fetches one week and returns (entry, error)."""
+        data, error = self.fetch_week(year, 2, week)
+        if error:
+            return None, error
+
+        games = []
+        for event in data.get('events', []):
+            home_team_data, away_team_data = espn_api.parse_competitors(event)
+            home_team_abv = home_team_data.get('team', {}).get('abbreviation')
+            away_team_abv = away_team_data.get('team', {}).get('abbreviation')
+            if home_team_abv and away_team_abv:
+                games.append({
+                    "id": event.get('id'), "date": event.get('date'),
+                    "status": event.get('status', {}).get('type', {}).get('name'),
+                    "home_team": {"abbreviation": home_team_abv, "logo": self.logos.get(home_team_abv, self.placeholder_logo)},
+                    "away_team": {"abbreviation": away_team_abv, "logo": self.logos.get(away_team_abv, self.placeholder_logo)}
+                })
+
+        kickoffs = [(parse_kickoff(game['date']), game['date']) for game in games]
+        kickoffs = [kickoff for kickoff in kickoffs if kickoff[0] is not None]
+        first_kickoff_ts, first_kickoff = min(kickoffs) if kickoffs else (None, None)
+        return {"games": games, "first_kickoff": first_kickoff, "first_kickoff_ts": first_kickoff_ts}, None
+
+    def build_season(self, year):
+        """
+        Fetches every week of a season concurrently and swaps it in. Weeks that fail
+        keep their previous entry. Returns the first error, if any.
+        """
+        weeks = range(1, SEASON_WEEKS + 1)
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            results = list(executor.map(lambda week: self.build_week(year, week), weeks))
+
+        with self.lock:
+            previous = self.seasons.get(year, {}).get('weeks', {})
+            season_weeks = {}
+            for week, (entry, _) in zip(weeks, results):
+                entry = entry or previous.get(week)
+                if entry:
+                    season_weeks[week] = entry
+            if season_weeks:
+                by_id = {game['id']: (week, game) for week, entry in season_weeks.items() for game in entry['games']}
+                self.seasons[year] = {'built_at': time.time(), 'weeks': season_weeks, 'by_id': by_id}
+        errors = [error for _, error in results if error]
+        if errors:
+            print(f"Schedule index for {year}: {len(errors)} of {SEASON_WEEKS} weeks failed to refresh ({errors[0]}).")
+        return errors[0] if errors else None
+
+    def _refresh(self, year):
+        try:
+            self.build_season(year)
+        finally:
+            with self.lock:
+                self.refreshing.discard(year)
+
+    def season(self, year):
+        """
+        Returns ({week: entry}, error). Builds the season on first use and schedules a
+        background refresh when it is stale.
+        """
+        error = year_error(year)
+        if error:
+            return None, error
+        with self.lock:
+            season = self.seasons.get(year)
+            stale = season and time.time() - season['built_at'] > REFRESH_SECONDS
+            if stale and year not in self.refreshing:
+                self.refreshing.add(year)
+                threading.Thread(target=self._refresh, args=(year,), daemon=True).start()
+            if not season:
+                built = self.building.get(year)
+                first = built is None
+                if first:
+                    built = self.building[year] = threading.Event()
+        if season:
+            return season['weeks'], None
+
+        error = None
+        if first:
+            try:
+                error = self.build_season(year)
+            finally:
+                with self.lock:
+                    del self.building[year]
+                built.set()
+        else:
+            built.wait()
+        with self.lock:
+            season = self.seasons.get(year)
+        if not season:
+            return None, error or "No schedule available."
+        return season['weeks'], None
+
+    def week(self, year, week):
+        """Returns (entry, error) for a single week."""
+        weeks, error = self.season(year)
+        if error:
+            return None, error
+        entry = weeks.get(week)
+        if not entry:
+            return None, f"No schedule for week {week} of {year}."
+        return entry, None
+
+    def game(self, year, game_id):
+        """Returns (week, game) for a scheduled regular-season game, or None."""
+        _, error = self.season(year)
+        if error:
+            return None
+        with self.lock:
+            return self.seasons[year]['by_id'].get(str(game_id))
+
+    def lock_status(self, year, week, now=None):
+        """
+        Returns ({'locked': bool, 'first_kickoff': iso date}, error). A week locks at
+        its first kickoff.
+        """
+        entry, error = self.week(year, week)
+        if error:
+            return None, error
+        now = time.time() if now is None else now
+        first_kickoff_ts = entry['first_kickoff_ts']
+        locked = first_kickoff_ts is not None and now >= first_kickoff_ts
+        return {"locked": locked, "first_kickoff": entry['first_kickoff']}, None
@@ -39,13 +39,8 @@ async function displayWeek(week) {
         if (!scheduleResponse.ok) throw new Error('Failed to fetch schedule');
         const scheduleData = await scheduleResponse.json();
         
-        // Determine if the week is locked by game time
-        let firstGameTime = null;
-        if (scheduleData.games.length > 0) {
-            const gameTimes = scheduleData.games.map(game => new Date(game.date).getTime());
-            firstGameTime = new Date(Math.min(...gameTimes));
-        }
-        const isLockedByTime = firstGameTime ? new Date() >= firstGameTime : false;
+        // The server reports whether the week's first game has kicked off
+        const isLockedByTime = scheduleData.locked === true;
 
         const gameRef = ref(database, `last_man_standing/${currentNFLYear}/${currentUser.uid}`);
         const gameSnapshot = await get(gameRef);
@@ -193,14 +188,9 @@ async function makePick(userId, year, week, teamAbv) {
     // --- END CORRECTION ---
 
     // Re-check time lock before saving
-    const scheduleResponse = await fetch(`/api/lms_schedule/${year}/${week}`);
-    const scheduleData = await scheduleResponse.json();
-    let firstGameTime = null;
-    if (scheduleData.games.length > 0) {
-        const gameTimes = scheduleData.games.map(game => new Date(game.date).getTime());
-        firstGameTime = new Date(Math.min(...gameTimes));
-    }
-    if (firstGameTime && new Date() >= firstGameTime) {
+    const lockResponse = await fetch(`/api/lms_lock/${year}/${week}`);
+    const lockData = await lockResponse.json();
+    if (lockData.locked) {
         alert("This week is locked. Your pick cannot be saved.");
         displayWeek(week);
         return;
@@ -0,0 +1,342 @@
+# survivor.py
+import argparse
+import heapq
+import itertools
+import math
+import random
+import time
+
+DIVISIONS_PER_CYCLE = 8
+NODE_BUDGET = 5000          # Nodes solved before settling for the best sequence found
+PRICE_ITERATIONS = 50       # Subgradient steps used to price the division rule at the root
+TIME_BUDGET_SECONDS = 2.0   # Wall-clock limit on one optimisation
+FORBIDDEN = 1e6             # Assignment cost of a pick that is not allowed
+EPSILON = 1e-9              # Log-probability tolerance when comparing sequences
+
+def division_state(prior_picks, division_of):
+    """
+    Replays the division lockout from static/js/lms.js: the divisions used in the
+    current cycle are those of the last (picks % 8) picks.
+    """
+    picks_in_cycle = len(prior_picks) % DIVISIONS_PER_CYCLE
+    if picks_in_cycle == 0:
+        return set()
+    return {division_of.get(team) for team in prior_picks[-picks_in_cycle:]} - {None}
+
+def assign(cost):
+    """
+    Minimum-cost assignment of every row to a distinct column (rows <= columns),
+    by the Hungarian method in O(rows^2 * columns). Returns the column of each row.
+    """
+    n, m = len(cost), len(cost[0])
+    u, v = [0.0] * (n + 1), [0.0] * (m + 1)
+    owner, way = [0] * (m + 1), [0] * (m + 1)
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        min_slack = [math.inf] * (m + 1)
+        visited = [False] * (m + 1)
+        while True:
+            visited[column] = True
+            current = owner[column]
+            costs, u_current = cost[current - 1], u[current]
+            delta, next_column = math.inf, 0
+            for j in range(1, m + 1):
+                if not visited[j]:
+                    slack = costs[j - 1] - u_current - v[j]
+                    if slack < min_slack[j]:
+                        min_slack[j] = slack
+                        way[j] = column
+                    if min_slack[j] < delta:
+                        delta, next_column = min_slack[j], j
+            for j in range(m + 1):
+                if visited[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            column = next_column
+            if owner[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+    result = [0] * n
+    for j in range(1, m + 1):
+        if owner[j]:
+            result[owner[j] - 1] = j - 1
+    return result
+
+def optimize_picks(weekly_win_probs, prior_picks, division_of,
+                   node_budget=NODE_BUDGET, time_budget=TIME_BUDGET_SECONDS):
+    """
+    Finds the pick sequence with the highest probability of surviving every week.
+
+    weekly_win_probs: one {team: win probability} dict per upcoming week, in order.
+    prior_picks: teams already picked this season, in pick order.
+    division_of: {team: division name}.
+
+    Picks are one per week, so the division cycle of every week is fixed and the
+    problem is an assignment of weeks to distinct teams (costs -log p) in which the
+    weeks of a cycle also need distinct divisions. Best-first branch and bound: each
+    node solves the assignment with the division rule relaxed, which bounds the
+    node, and a node whose solution repeats a division in a cycle is split on which
+    of those weeks (if any) keeps that division. Every relaxed solution is also
+    repaired greedily into a valid sequence, to tighten the incumbent early.
+
+    Stops after node_budget relaxations or time_budget seconds with the best valid
+    sequence found so far. Returns (survival_probability,
+    [(week_index, team, win_probability), ...], proven_optimal).
+    """
+    deadline = time.monotonic() + time_budget
+    weeks = len(weekly_win_probs)
+    used = set(prior_picks)
+    teams = sorted({team for week in weekly_win_probs for team, prob in week.items() if prob > 0} - used)
+    if weeks == 0:
+        return 1.0, [], True
+    if len(teams) < weeks:
+        return 0.0, [], True
+
+    division = [division_of.get(team) for team in teams]
+    cycle_of = [(len(prior_picks) + index) // DIVISIONS_PER_CYCLE for index in range(weeks)]
+    blocked = division_state(prior_picks, division_of)
+    base_cost = [
+        [FORBIDDEN if week.get(team, 0) <= 0 or (cycle_of[index] == cycle_of[0] and division[j] in blocked)
+         else -math.log(week[team]) for j, team in enumerate(teams)]
+        for index, week in enumerate(weekly_win_probs)
+    ]
+
+    def costs(forbidden, prices=None):
+        """The assignment costs with forbidden (week, division) pairs and optional division prices."""
+        if not forbidden and not prices:
+            return base_cost
+        cost = [row[:] for row in base_cost]
+        if prices:
+            for index, row in enumerate(cost):
+                cycle = cycle_of[index]
+                for j, team_division in enumerate(division):
+                    row[j] += prices.get((cycle, team_division), 0.0)
+        for index, banned in forbidden:
+            row = cost[index]
+            for j, team_division in enumerate(division):
+                if team_division == banned:
+                    row[j] = FORBIDDEN
+        return cost
+
+    def relax(forbidden):
+        """Solves a node (forbidden (week, division) pairs); returns (cost, columns) or None."""
+        cost = costs(forbidden)
+        columns = assign(cost)
+        total = sum(cost[index][j] for index, j in enumerate(columns))
+        return (total, columns) if total < FORBIDDEN else None
+
+    def priced_bound(forbidden, prices):
+        """
+        Lagrangian bound: with a price >= 0 on each (cycle, division), the priced
+        assignment minus the sum of the prices is a lower bound on any valid sequence.
+        """
+        cost = costs(forbidden, prices)
+        return sum(cost[index][j] for index, j in enumerate(assign(cost))) - sum(prices.values())
+
+    def conflict(columns):
+        """The (cycle, division) picked in the most weeks of its cycle and those weeks, or None."""
+        seen = {}
+        for index, j in enumerate(columns):
+            if division[j] is not None:
+                seen.setdefault((cycle_of[index], division[j]), []).append(index)
+        key, found = max(seen.items(), key=lambda item: len(item[1]), default=(None, ()))
+        return (key, found) if len(found) > 1 else None
+
+    def repair(columns):
+        """A valid sequence from a relaxed one: keep its best picks, refill the rest greedily."""
+        taken, cycle_divisions, chosen = set(), {}, [None] * weeks
+        for index in sorted(range(weeks), key=lambda index: base_cost[index][columns[index]]):
+            j = columns[index]
+            key = (cycle_of[index], division[j])
+            if j not in taken and key not in cycle_divisions:
+                taken.add(j)
+                if division[j] is not None:
+                    cycle_divisions[key] = index
+                chosen[index] = j
+        for index in range(weeks):
+            if chosen[index] is not None:
+                continue
+            options = [j for j in range(len(teams)) if j not in taken
+                       and (cycle_of[index], division[j]) not in cycle_divisions and base_cost[index][j] < FORBIDDEN]
+            if not options:
+                return None
+            j = min(options, key=lambda j: base_cost[index][j])
+            taken.add(j)
+            if division[j] is not None:
+                cycle_divisions[(cycle_of[index], division[j])] = index
+            chosen[index] = j
+        return sum(base_cost[index][j] for index, j in enumerate(chosen)), chosen
+
+    def division_prices(lower, upper):
+        """
+        Prices for the division rule, tuned by subgradient steps on the root bound
+        (Polyak step sizes against the incumbent). Returns the best prices found.
+        """
+        keys = {(cycle_of[index], team_division) for index in range(weeks) for team_division in set(division) - {None}}
+        price = dict.fromkeys(keys, 0.0)
+        best, best_lower = {}, lower
+        if upper == math.inf:
+            upper = lower + 1.0
+        scale = 1.0
+        for _ in range(PRICE_ITERATIONS):
+            cost = costs(frozenset(), price)
+            columns = assign(cost)
+            bound = sum(cost[index][j] for index, j in enumerate(columns)) - sum(price.values())
+            if bound > best_lower:
+                best, best_lower = dict(price), bound
+            picked = dict.fromkeys(keys, -1)
+            for index, j in enumerate(columns):
+                if division[j] is not None:
+                    picked[(cycle_of[index], division[j])] += 1
+            norm = sum(count * count for count in picked.values())
+            if norm == 0 or upper - bound <= EPSILON:
+                break
+            step = scale * (upper - bound) / norm
+            for key in keys:
+                price[key] = max(0.0, price[key] + step * picked[key])
+            scale *= 0.95
+        return best
+
+    root = relax(frozenset())
+    if root is None:
+        return 0.0, [], True
+    best_cost, best_columns = repair(root[1]) or (math.inf, None)
+    prices = division_prices(root[0], best_cost)
+
+    order = itertools.count()   # Tie-breaker so the heap never compares nodes
+    heap = []
+    nodes = 0
+
+    def push(forbidden, solved=None):
+        nonlocal best_cost, best_columns, nodes
+        nodes += 1
+        solved = solved or relax(forbidden)
+        if solved is None:
+            return
+        cost, columns = solved
+        if cost >= best_cost - EPSILON:
+            return
+        if prices:
+            cost = max(cost, priced_bound(forbidden, prices))
+            if cost >= best_cost - EPSILON:
+                return
+        repaired = repair(columns)
+        if repaired and repaired[0] < best_cost:
+            best_cost, best_columns = repaired
+        heapq.heappush(heap, (cost, next(order), forbidden, columns))
+
+    push(frozenset(), root)
+    proven = True
+    while heap:
+        cost, _, forbidden, columns = heapq.heappop(heap)
+        if cost >= best_cost - EPSILON:
+            break   # Every open node is bounded by the incumbent.
+        found = conflict(columns)
+        if found is None:
+            # A valid sequence that is optimal for its node, and the best bound left.
+            best_cost = sum(base_cost[index][j] for index, j in enumerate(columns))
+            best_columns = columns
+            break
+        if nodes >= node_budget or time.monotonic() > deadline:
+            proven = False
+            break
+        (cycle, banned), conflicting = found
+        # At most one week of the cycle keeps this division: one child per week
+        # that may keep it, and one in which none of them does.
+        cycle_weeks = [index for index in range(weeks) if cycle_of[index] == cycle]
+        for keeper in conflicting:
+            push(forbidden | {(index, banned) for index in cycle_weeks if index != keeper})
+        push(forbidden | {(index, banned) for index in conflicting})
+
+    if best_columns is None:
+        return 0.0, [], proven
+    path = [(index, teams[j], weekly_win_probs[index][teams[j]]) for index, j in enumerate(best_columns)]
+    return math.exp(-best_cost), path, proven
+
+# --- Self-check (python survivor.py --check) ---
+
+def brute_force(weekly_win_probs, prior_picks, division_of):
+    """Best survival probability by trying every valid sequence, for short horizons."""
+    best = 0.0
+
+    def extend(index, picks, value):
+        nonlocal best
+        if value <= best:
+            return
+        if index == len(weekly_win_probs):
+            best = value
+            return
+        locked = division_state(picks, division_of)
+        for team, prob in weekly_win_probs[index].items():
+            if prob > 0 and team not in picks and division_of.get(team) not in locked:
+                extend(index + 1, picks + [team], value * prob)
+
+    extend(0, list(prior_picks), 1.0)
+    return best
+
+def random_season(rng, weeks, teams):
+    """Weekly {team: win probability} with random pairings and about 10% byes."""
+    season = []
+    for _ in range(weeks):
+        order = rng.sample(teams, len(teams))
+        probs = {}
+        for home, away in zip(order[::2], order[1::2]):
+            if rng.random() < 0.1:
+                continue
+            probs[home] = rng.random()
+            probs[away] = 1 - probs[home]
+        season.append(probs)
+    return season
+
+def random_prior_picks(rng, count, teams, division_of):
+    picks = []
+    for _ in range(count):
+        locked = division_state(picks, division_of)
+        picks.append(rng.choice([team for team in teams if team not in picks and division_of[team] not in locked]))
+    return picks
+
+def self_check(cases=200, timed_seasons=20):
+    """
+    Compares optimize_picks with brute force on short horizons (across division
+    cycle boundaries, with prior picks) and checks that full 18-week seasons stay
+    within the time budget. Returns the number of failures.
+    """
+    teams = [f'T{i:02d}' for i in range(32)]
+    division_of = {team: f'D{i // 4}' for i, team in enumerate(teams)}
+    failures = 0
+    for seed in range(cases):
+        rng = random.Random(seed)
+        prior_picks = random_prior_picks(rng, rng.randint(0, 20), teams, division_of)
+        season = random_season(rng, rng.randint(1, 5), teams)
+        value, _, proven = optimize_picks(season, prior_picks, division_of)
+        expected = brute_force(season, prior_picks, division_of)
+        if not proven or abs(value - expected) > 1e-9 * max(expected, 1e-12):
+            print(f"Case {seed}: optimize_picks gave {value} (proven={proven}), brute force {expected}.")
+            failures += 1
+
+    slowest = 0.0
+    for seed in range(timed_seasons):
+        season = random_season(random.Random(10_000 + seed), 18, teams)
+        start = time.perf_counter()
+        optimize_picks(season, [], division_of)
+        elapsed = time.perf_counter() - start
+        slowest = max(slowest, elapsed)
+        if elapsed > TIME_BUDGET_SECONDS * 1.5:
+            print(f"Season {seed}: took {elapsed:.2f} s, over the {TIME_BUDGET_SECONDS} s budget.")
+            failures += 1
+    print(f"{cases} brute-force cases, {timed_seasons} full seasons (slowest {slowest:.2f} s): {failures} failures.")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Last Man Standing pick optimizer.")
+    parser.add_argument('--check', action='store_true', help="Compare against brute force and check the time budget.")
+    args = parser.parse_args()
+    if args.check:
+        raise SystemExit(1 if self_check() else 0)
+    parser.print_help()
@@ -1,13 +1,27 @@
 import math
+from collections import deque
+
+# Per-game stats tracked by Team, in add_game argument order.
+FORM_STATS = [
+    'pyds_for', 'pyds_agst', 'ryds_for', 'ryds_agst', 'takeaways', 'giveaways',
+    'points_for', 'points_agst', 'pass_attempts', 'rush_attempts'
+]
+FORM_INDEX = {stat: i for i, stat in enumerate(FORM_STATS)}
+# Weight of the newest game in the exponentially decayed form averages.
+FORM_ALPHA = 0.35
 
 # --- Team Statistics Class ---
 class Team:
     """
-    Represents a team and holds its cumulative statistics for a season.
+    Represents a team and holds its cumulative statistics for a season, plus
+    recency-weighted form: an exponentially decayed average of every stat (a list
+    in FORM_STATS order) and, when form_window > 0, running last-N averages over a
+    ring buffer of games. 'recent' seeds the ring buffer with saved games.
     """
     def __init__(self, pyds_for=0, pyds_agst=0, ryds_for=0, ryds_agst=0, 
                  takeaways=0, giveaways=0, points_for=0, points_agst=0, 
-                 pass_attempts=0, rush_attempts=0, games=0):
+                 pass_attempts=0, rush_attempts=0, games=0,
+                 form=None, form_window=0, form_alpha=FORM_ALPHA, recent=None):
         self.pyds_for = float(pyds_for)
         self.pyds_agst = float(pyds_agst)
         self.ryds_for = float(ryds_for)
@@ -20,6 +34,26 @@ class Team:
         self.rush_attempts = float(rush_attempts)
         self.games = float(games) if games > 0 else 0
 
+        # Without saved form, start from the season averages (0 before any games).
+        self.form_alpha = form_alpha
+        form = form or {}
+        self.form = [float(form[stat]) if stat in form else getattr(self, f'avg_{stat}') for stat in FORM_STATS]
+        self.recent = None
+        self.recent_sums = [0.0] * len(FORM_STATS)
+        if form_window > 0:
+            self.recent = deque(maxlen=form_window)
+            for game in recent or ():
+                self._push_recent(tuple(float(value) for value in game))
+
+    def _push_recent(self, game):
+        # Keep running window sums so last-N reads stay O(1).
+        recent = self.recent
+        if len(recent) == recent.maxlen:
+            self.recent_sums = [total + value - old for total, value, old in zip(self.recent_sums, game, recent[0])]
+        else:
+            self.recent_sums = [total + value for total, value in zip(self.recent_sums, game)]
+        recent.append(game)
+
     def add_game(self, pyds_for, pyds_agst, ryds_for, ryds_agst, 
                  takeaways, giveaways, points_for, points_agst,
                  pass_attempts, rush_attempts):
@@ -38,6 +72,39 @@ class Team:
         self.rush_attempts += rush_attempts
         self.games += 1
 
+        # Unrolled in FORM_STATS order; this runs for every game ingested.
+        alpha = 1.0 if self.games == 1 else self.form_alpha
+        form = self.form
+        form[0] += alpha * (pyds_for - form[0])
+        form[1] += alpha * (pyds_agst - form[1])
+        form[2] += alpha * (ryds_for - form[2])
+        form[3] += alpha * (ryds_agst - form[3])
+        form[4] += alpha * (takeaways - form[4])
+        form[5] += alpha * (giveaways - form[5])
+        form[6] += alpha * (points_for - form[6])
+        form[7] += alpha * (points_agst - form[7])
+        form[8] += alpha * (pass_attempts - form[8])
+        form[9] += alpha * (rush_attempts - form[9])
+
+        if self.recent is not None:
+            self._push_recent((pyds_for, pyds_agst, ryds_for, ryds_agst, takeaways, giveaways,
+                               points_for, points_agst, pass_attempts, rush_attempts))
+
+    def form_avg(self, stat):
+        """
+        Exponentially decayed per-game average of a stat.
+        """
+        return self.form[FORM_INDEX[stat]]
+
+    def recent_avg(self, stat):
+        """
+        Average of a stat over the last-N ring buffer, falling back to the season
+        average when no games are buffered (e.g. stats loaded from a CSV).
+        """
+        if not self.recent:
+            return getattr(self, f'avg_{stat}')
+        return self.recent_sums[FORM_INDEX[stat]] / len(self.recent)
+
     # Properties to calculate averages, avoiding division by zero
     @property
     def avg_pyds_for(self):
@@ -80,6 +147,26 @@ def pyth_win(val_for, val_agst):
         return 0.5
     return val_for**2.37 / (val_for**2.37 + val_agst**2.37)
 
+class FormView:
+    """
+    Stand-in for a team's current-season stats whose avg_* attributes are its
+    recency-weighted form, so the prediction model reads plain attributes either way.
+    """
+    def __init__(self, team, form):
+        for stat in FORM_STATS:
+            setattr(self, f'avg_{stat}', current_stat(team, stat, form))
+
+def current_stat(team, stat, form=None):
+    """
+    Returns a team's current-season per-game value of a stat: the season average by
+    default, or the recency-weighted form ('ewma') or last-N window ('last_n').
+    """
+    if form == 'ewma':
+        return team.form_avg(stat)
+    if form == 'last_n':
+        return team.recent_avg(stat)
+    return getattr(team, f'avg_{stat}')
+
 def expect_stat(off_stat, def_stat):
     """
     Calculates the expected outcome of a stat when an offense meets a defense.
@@ -107,7 +194,8 @@ def get_weighted_stat(old_stat, new_stat, week):
 def parse_game_json(data, teams_dict):
     """
     Parses the boxscore JSON from the ESPN API to extract game stats and
-    updates the provided dictionary of Team objects.
+    updates the provided dictionary of Team objects. Returns the per-team game
+    values as [(team1_abv, values), (team2_abv, values)], or None on failure.
     """
     try:
         boxscore = data.get('boxscore', {})
@@ -160,18 +248,21 @@ def parse_game_json(data, teams_dict):
         t2_pass_attempts_str = get_stat_display_value(team2_stats, 'completionAttempts')
         t2_pass_attempts = float(t2_pass_attempts_str.split('/')[1]) if '/' in t2_pass_attempts_str else 0
 
-        teams_dict[team1_abv].add_game(
+        team1_game = dict(
             pyds_for=t1_pyds, pyds_agst=t2_pyds, ryds_for=t1_ryds, ryds_agst=t2_ryds,
             takeaways=t2_giveaways, giveaways=t1_giveaways, points_for=team1_score, 
             points_agst=team2_score, pass_attempts=t1_pass_attempts, rush_attempts=t1_rush_attempts
         )
-        teams_dict[team2_abv].add_game(
+        team2_game = dict(
             pyds_for=t2_pyds, pyds_agst=t1_pyds, ryds_for=t2_ryds, ryds_agst=t1_ryds,
             takeaways=t1_giveaways, giveaways=t2_giveaways, points_for=team2_score, 
             points_agst=team1_score, pass_attempts=t2_pass_attempts, rush_attempts=t2_rush_attempts
         )
+        teams_dict[team1_abv].add_game(**team1_game)
+        teams_dict[team2_abv].add_game(**team2_game)
         
         print(f"Successfully updated stats for {team1_abv} vs {team2_abv}")
+        return [(team1_abv, team1_game), (team2_abv, team2_game)]
 
     except (KeyError, IndexError, TypeError, ValueError) as e:
         print(f"Error parsing game JSON: {e}")
\ No newline at end of file